@@ -1,6 +1,11 @@
+import uuid
+
 import dash
 from dash import Dash, html, Input, Output, State, callback
 import dash_bootstrap_components as dbc
+from flask import request
+
+from utils.query_engine import SESSION_COOKIE
 
 app = Dash(
     __name__,
@@ -9,6 +14,15 @@ app = Dash(
     suppress_callback_exceptions=True,
 )
 
+
+# Tag each browser session so superseded queries can be cancelled per user
+@app.server.after_request
+def set_session_cookie(response):
+    if SESSION_COOKIE not in request.cookies:
+        response.set_cookie(SESSION_COOKIE, uuid.uuid4().hex, httponly=True)
+    return response
+
+
 # Sidebar with navigation links
 sidebar = html.Div(
     [
@@ -0,0 +1,425 @@
+"""
+Benchmarks for utils/load_nfl_data.py.
+
+Run from the repo root:
+    python -m benchmarks.bench_loader                  # every scenario
+    python -m benchmarks.bench_loader incremental      # just one
+
+Uses synthetic play-by-play in place of nflreadpy downloads, written to
+a temporary directory.
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import pandas.testing as pd_testing
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from benchmarks import fixtures
+
+SEASONS = [2022, 2023, 2024, 2025]
+
+
+class FixtureSource:
+    """
+    Stands in for nfl.load_pbp: completed seasons are fixed, the current
+    one grows a week at a time. Seasons are generated once, so timings
+    cover the loader's own work; plays_fetched stands in for download size.
+    """
+
+    def __init__(self, current_weeks: int, cache: bool = True, latency: float = 0):
+        self.current_weeks = current_weeks
+        self.latency = latency
+        self.requests = []
+        self.plays_fetched = 0
+        self._cache = {} if cache else None
+
+    def __call__(self, seasons):
+        self.requests.append(list(seasons))
+        # Download time, one request per season
+        time.sleep(self.latency * len(seasons))
+        pbp = pl.concat([self.season(season) for season in seasons])
+        self.plays_fetched += pbp.height
+        return pbp
+
+    def season(self, season):
+        weeks = self.current_weeks if season == SEASONS[-1] else fixtures.WEEKS
+        if self._cache is None:
+            return fixtures.make_pbp((season,), weeks=weeks, seed=season)
+        if (season, weeks) not in self._cache:
+            self._cache[season, weeks] = fixtures.make_pbp(
+                (season,), weeks=weeks, seed=season
+            )
+        return self._cache[season, weeks]
+
+
+def bench_incremental(repeat: int):
+    """Full reload vs incremental update after one more week is played"""
+    print("Incremental load: week 11 of the current season becomes available")
+    rounds = max(1, repeat // 100)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with fixtures.loader_output(Path(tmp)) as load_nfl_data, quiet():
+            source = FixtureSource(current_weeks=10)
+            full_ms, incremental_ms = [], []
+            full_plays = incremental_plays = 0
+            for _ in range(rounds):
+                for path in Path(tmp).iterdir():
+                    if path.is_file():
+                        path.unlink()
+                source.current_weeks = 10
+                load_nfl_data.update_play_by_play(SEASONS, load_pbp=source)
+
+                # The old behaviour: download everything, rebuild everything
+                source.current_weeks = 11
+                fetched = source.plays_fetched
+                start = time.perf_counter()
+                team_games, _ = load_nfl_data.load_play_by_play(
+                    SEASONS, load_pbp=source
+                )
+                load_nfl_data.create_team_season_rollups(team_games)
+                full_ms.append((time.perf_counter() - start) * 1000)
+                full_plays = source.plays_fetched - fetched
+                full_team_games = team_games
+                full_player_weeks = pl.read_parquet(
+                    Path(tmp) / load_nfl_data.PLAYER_WEEKS_FILE
+                )
+
+                # Put week 10 back on disk, then update incrementally
+                source.current_weeks = 10
+                load_nfl_data.update_play_by_play(SEASONS, load_pbp=source)
+                source.current_weeks = 11
+                fetched = source.plays_fetched
+                past_seasons = _season_file_stamps(load_nfl_data, SEASONS[:-1])
+                start = time.perf_counter()
+                affected = load_nfl_data.update_play_by_play(SEASONS, load_pbp=source)
+                incremental_ms.append((time.perf_counter() - start) * 1000)
+                incremental_plays = source.plays_fetched - fetched
+                # Only the fetched season's files were rewritten
+                assert past_seasons == _season_file_stamps(load_nfl_data, SEASONS[:-1])
+
+            expected = _by_game(full_team_games)
+            actual = _by_game(pl.read_parquet(Path(tmp) / "nfl_team_games.parquet"))
+            assert_frame_equal(expected, actual)
+            assert_frame_equal(
+                full_player_weeks,
+                pl.read_parquet(Path(tmp) / load_nfl_data.PLAYER_WEEKS_FILE),
+            )
+
+    print(
+        f"  full reload           {sum(full_ms) / rounds:8.0f} ms"
+        f"   fetched {full_plays:,} plays ({len(SEASONS)} seasons)"
+    )
+    print(
+        f"  incremental update    {sum(incremental_ms) / rounds:8.0f} ms"
+        f"   fetched {incremental_plays:,} plays ({source.requests[-1]}),"
+        f" {len(affected)} games rewritten"
+    )
+    print("  team game and player week stats match the full reload")
+    print("  earlier seasons' play-by-play files were left alone")
+
+
+def _season_file_stamps(load_nfl_data, seasons) -> dict:
+    return {
+        path: path.stat().st_mtime_ns
+        for season in seasons
+        for pattern in (
+            load_nfl_data.PBP_RAW_FILE,
+            load_nfl_data.PBP_SLIM_FILE,
+            load_nfl_data.PBP_PLAYER_INDEX_FILE,
+        )
+        for path in [load_nfl_data.pbp_file(pattern, season)]
+    }
+
+
+def quiet():
+    """Hide the loader's progress output"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _by_game(team_games):
+    return team_games.sort(["game_id", "posteam"])
+
+
+def team_games_pandas(pbp):
+    """
+    The previous create_team_game_stats() aggregation: pandas conversion,
+    three group-bys and two merges. Kept as the reference output.
+    """
+    pbp = pbp.to_pandas()
+    team_games = (
+        pbp.groupby(["game_id", "season", "week", "posteam"])
+        .agg(
+            {
+                "yards_gained": "sum",
+                "pass_attempt": "sum",
+                "rush_attempt": "sum",
+                "first_down": "sum",
+                "interception": "sum",
+                "fumble_lost": "sum",
+                "touchdown": "sum",
+                "posteam_score": "max",
+            }
+        )
+        .reset_index()
+        .rename(
+            columns={
+                "yards_gained": "total_yards",
+                "pass_attempt": "pass_attempts",
+                "rush_attempt": "rush_attempts",
+                "first_down": "first_downs",
+                "posteam_score": "points",
+            }
+        )
+    )
+    for column, flag in (
+        ("passing_yards", "pass_attempt"),
+        ("rushing_yards", "rush_attempt"),
+    ):
+        yards = (
+            pbp[pbp[flag] == 1]
+            .groupby(["game_id", "posteam"])["yards_gained"]
+            .sum()
+            .reset_index()
+            .rename(columns={"yards_gained": column})
+        )
+        team_games = team_games.merge(yards, on=["game_id", "posteam"], how="left")
+        team_games[column] = team_games[column].fillna(0)
+    team_games["turnovers"] = team_games["interception"] + team_games["fumble_lost"]
+    return team_games.sort_values(["season", "week", "posteam"])
+
+
+def bench_team_games(repeat: int):
+    """pandas multi-pass aggregation vs the single-pass polars one"""
+    copies = 8
+    source = FixtureSource(current_weeks=fixtures.WEEKS)
+    pbp = source(SEASONS)
+    # Repeat the synthetic seasons (as distinct games) to reach real pbp size
+    pbp = pl.concat(
+        pbp.with_columns(pl.col("game_id") + f"_{copy}") for copy in range(copies)
+    )
+    # Plays with no offense, which neither version counts
+    pbp = pl.concat(
+        [pbp, pbp.head(1000).with_columns(pl.lit(None, pl.Utf8).alias("posteam"))]
+    )
+    print(f"Team game stats: aggregating {pbp.height:,} plays")
+
+    from utils.load_nfl_data import aggregate_team_games
+
+    rounds = max(1, repeat // 20)
+    for label, fn in (
+        ("pandas, 3 group-bys + 2 merges", team_games_pandas),
+        ("polars lazy, single pass", aggregate_team_games),
+    ):
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn(pbp)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"  {label:<32} {min(samples):8.0f} ms (best of {rounds})")
+
+    expected = pl.from_pandas(team_games_pandas(pbp))
+    actual = aggregate_team_games(pbp)
+    assert_frame_equal(_by_game(expected), _by_game(actual))
+    print(f"  outputs match ({actual.height:,} team games)")
+
+
+def bench_memory(repeat: int):
+    """Peak RSS loading N seasons all at once vs one season at a time"""
+    print("Ingestion memory: peak RSS of a fresh process loading N seasons")
+    context = multiprocessing.get_context("spawn")
+    for n_seasons in (1, 2, 4, 8):
+        row = []
+        for mode in ("all at once", "per season"):
+            with context.Pool(1) as pool:
+                peak, baseline = pool.apply(_ingest_peak_rss, (mode, n_seasons))
+            row.append(f"{mode} {peak:5.0f} MB (+{peak - baseline:4.0f})")
+        print(f"  {n_seasons} seasons   " + "   ".join(row))
+
+
+def _ingest_peak_rss(mode: str, n_seasons: int) -> tuple:
+    """Worker: run one ingestion and return (peak, baseline) RSS in MB"""
+    from utils import load_nfl_data
+
+    seasons = list(range(SEASONS[-1] - n_seasons + 1, SEASONS[-1] + 1))
+    source = FixtureSource(current_weeks=fixtures.WEEKS, cache=False)
+    baseline = _peak_rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        load_nfl_data.DATA_DIR = Path(tmp)
+        if mode == "all at once":
+            # The previous loader: one download, one write, one aggregation
+            pbp = source(seasons)
+            pbp.write_parquet(Path(tmp) / "nfl_pbp_raw.parquet")
+            load_nfl_data.create_team_game_stats(pbp)
+        else:
+            load_nfl_data.load_play_by_play(seasons, load_pbp=source)
+
+    return _peak_rss_mb(), baseline
+
+
+def _peak_rss_mb() -> float:
+    """
+    High-water RSS of this process. Read from /proc rather than getrusage(),
+    whose ru_maxrss carries over from the parent across exec.
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not reported; run this scenario on Linux")
+
+
+def bench_datasets(repeat: int):
+    """pbp, teams and rosters loaded one after another vs concurrently"""
+    latency = {"pbp": 1.0, "teams": 0.3, "rosters": 0.6}
+    print(
+        "Dataset loading: simulated download time per request "
+        + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in latency.items())
+    )
+    source = FixtureSource(current_weeks=fixtures.WEEKS, latency=latency["pbp"])
+    source(SEASONS)  # generate the seasons outside the timings
+
+    def download(frame, seconds):
+        def load(*args):
+            time.sleep(seconds)
+            return frame
+
+        return load
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with fixtures.loader_output(Path(tmp)) as load_nfl_data, quiet():
+            loaders = {
+                "pbp": lambda: load_nfl_data.load_play_by_play(
+                    SEASONS, load_pbp=source
+                ),
+                "teams": lambda: load_nfl_data.load_team_info(
+                    download(fixtures.make_teams(), latency["teams"])
+                ),
+                "rosters": lambda: load_nfl_data.load_rosters(
+                    [SEASONS[-1]],
+                    download(fixtures.make_rosters(), latency["rosters"]),
+                ),
+            }
+
+            start = time.perf_counter()
+            for load in loaders.values():
+                load()
+            sequential_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            results = load_nfl_data.load_datasets(loaders)
+            concurrent_ms = (time.perf_counter() - start) * 1000
+
+            # A failing dataset leaves the others loaded
+            failing = dict(loaders, teams=lambda: 1 / 0)
+            isolated = load_nfl_data.load_datasets(failing)
+
+    print(f"  one after another       {sequential_ms:8.0f} ms")
+    print(f"  thread pool             {concurrent_ms:8.0f} ms")
+    for name, (seconds, error) in results.items():
+        assert error is None, error
+        print(f"    {name:<8} {seconds * 1000:8.0f} ms")
+    failed = [name for name, (_, error) in isolated.items() if error]
+    assert failed == ["teams"], failed
+    print("  a failing teams download leaves pbp and rosters loaded")
+
+
+def player_weeks_pandas(pbp, player_id):
+    """
+    What the Fantasy Value page computed on every player selection before
+    nfl_player_weeks.parquet: filter the plays, then group by week.
+    """
+    df = pbp.query("rusher_id == @player_id or receiver_id == @player_id")
+    usage = df.groupby("week").agg(
+        snaps=("play_id", "count"),
+        targets=("pass_attempt", "sum"),
+        rushes=("rush_attempt", "sum"),
+        completions=("complete_pass", "sum"),
+    )
+    usage["rush_yards"] = (
+        df[df["rush_attempt"] == 1].groupby("week")["yards_gained"].sum()
+    )
+    usage["rec_yards"] = (
+        df[df["complete_pass"] == 1].groupby("week")["yards_gained"].sum()
+    )
+    return usage.fillna(0).reset_index()
+
+
+def player_weeks_lookup(player_weeks, player_id):
+    """The page's lookup: the player's rows, summed per week"""
+    weeks = player_weeks[player_weeks["player_id"] == player_id]
+    return (
+        weeks.groupby("week")[
+            ["snaps", "targets", "rushes", "completions", "rush_yards", "rec_yards"]
+        ]
+        .sum()
+        .reset_index()
+    )
+
+
+def bench_player_weeks(repeat: int):
+    """Per-selection pbp aggregation vs a lookup in the player weeks table"""
+    pbp = FixtureSource(current_weeks=fixtures.WEEKS)(SEASONS)
+    print(f"Player weeks: one player selection over {pbp.height:,} plays")
+
+    from utils.load_nfl_data import aggregate_player_weeks
+
+    start = time.perf_counter()
+    player_weeks = aggregate_player_weeks(pbp)
+    build_ms = (time.perf_counter() - start) * 1000
+    pbp, player_weeks = pbp.to_pandas(), player_weeks.to_pandas()
+
+    players = [pid for team in fixtures.TEAMS[:4] for pid in fixtures.player_ids(team)]
+    for label, fn, data in (
+        ("aggregate raw plays", player_weeks_pandas, pbp),
+        ("player weeks lookup", player_weeks_lookup, player_weeks),
+    ):
+        samples = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            fn(data, players[i % len(players)])
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"  {label:<24} {sorted(samples)[len(samples) // 2]:8.2f} ms (p50)")
+    print(
+        f"  building the table once  {build_ms:8.0f} ms"
+        f"   ({len(player_weeks):,} player weeks)"
+    )
+
+    for player_id in players:
+        expected = player_weeks_pandas(pbp, player_id)
+        actual = player_weeks_lookup(player_weeks, player_id)
+        pd_testing.assert_frame_equal(
+            expected, actual, check_dtype=False, check_names=False
+        )
+    print(f"  outputs match ({len(players)} players)")
+
+
+SCENARIOS = {
+    "incremental": bench_incremental,
+    "team_games": bench_team_games,
+    "memory": bench_memory,
+    "datasets": bench_datasets,
+    "player_weeks": bench_player_weeks,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", choices=[[], *SCENARIOS])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    for name in args.scenarios or SCENARIOS:
+        SCENARIOS[name](args.repeat)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,802 @@
+"""
+Latency benchmarks for utils/query_engine.py.
+
+Run from the repo root:
+    python -m benchmarks.bench_query_engine            # every scenario
+    python -m benchmarks.bench_query_engine pool       # just one
+
+Uses synthetic data in a temporary directory unless --data-dir points at
+a real data/parquet folder.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import polars as pl
+import pyarrow.parquet as pq
+
+from benchmarks import fixtures
+from utils import fantasy_data, query_engine
+
+TEAM_SEASON_SQL = """
+    SELECT week, total_yards, passing_yards, rushing_yards, points
+    FROM 'nfl_team_games.parquet'
+    WHERE season = ? AND posteam = ?
+    ORDER BY week
+"""
+TEAM_SEASON_PARAMS = [2024, "KC"]
+
+
+def timed(fn, repeat: int) -> list:
+    """Call fn repeat times (after one warm-up) and return latencies in ms"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"  {label:<32} p50 {statistics.median(samples):8.3f} ms"
+        f"   p95 {p95:8.3f} ms   n={len(samples)}"
+    )
+
+
+def bench_pool(repeat: int):
+    """Per-call connections (the old behaviour) vs the shared cursor pool"""
+    print("Connection pool: team/season lookup on nfl_team_games.parquet")
+
+    def unpooled():
+        conn = duckdb.connect(database=":memory:")
+        conn.execute(f"SET file_search_path='{query_engine.DATA_DIR}'")
+        try:
+            conn.execute(TEAM_SEASON_SQL, TEAM_SEASON_PARAMS).fetchdf()
+        finally:
+            conn.close()
+
+    def pooled():
+        query_engine.query_parquet(TEAM_SEASON_SQL, TEAM_SEASON_PARAMS, cache=False)
+
+    report("new connection per query", timed(unpooled, repeat))
+    report("pooled cursor", timed(pooled, repeat))
+
+    # Eight callbacks hitting the engine at once
+    for label, fn in (
+        ("new connection x8 threads", unpooled),
+        ("pooled x8 threads", pooled),
+    ):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+
+            def burst():
+                list(executor.map(lambda _: fn(), range(8)))
+
+            report(label, [t / 8 for t in timed(burst, max(1, repeat // 8))])
+
+
+def bench_cache(repeat: int):
+    """Uncached vs cached results for the page's recurring queries"""
+    print("Result cache: distinct teams, distinct seasons, team/season lookup")
+    queries = [
+        ("SELECT DISTINCT posteam FROM 'nfl_team_games.parquet' ORDER BY 1", None),
+        ("SELECT DISTINCT season FROM 'nfl_team_games.parquet' ORDER BY 1", None),
+        (TEAM_SEASON_SQL, TEAM_SEASON_PARAMS),
+    ]
+
+    def run(cache):
+        for sql, params in queries:
+            query_engine.query_parquet(sql, params, cache=cache)
+
+    query_engine.clear_cache()
+    report("uncached (3 queries)", timed(lambda: run(False), repeat))
+    report("cached (3 queries)", timed(lambda: run(True), repeat))
+    print(f"  {query_engine.cache_stats()}")
+
+
+def bench_prepared(repeat: int):
+    """f-string SQL vs bound parameters vs prepared registry queries"""
+    print("Prepared queries: cycling team/season lookups, cache disabled")
+    selections = [(s, t) for s in (2022, 2023, 2024, 2025) for t in fixtures.TEAMS]
+    query_engine.register_query("bench_team_season", TEAM_SEASON_SQL)
+    position = iter(range(10**9))
+
+    def pick():
+        return selections[next(position) % len(selections)]
+
+    def f_string():
+        season, team = pick()
+        sql = TEAM_SEASON_SQL.replace("?", "{}", 2).format(season, f"'{team}'")
+        query_engine.query_parquet(sql, cache=False)
+
+    def bound():
+        query_engine.query_parquet(TEAM_SEASON_SQL, list(pick()), cache=False)
+
+    def prepared():
+        query_engine.run_query("bench_team_season", list(pick()), cache=False)
+
+    report("f-string SQL", timed(f_string, repeat))
+    report("bound parameters", timed(bound, repeat))
+    report("prepared (run_query)", timed(prepared, repeat))
+
+
+def bench_arrow(repeat: int):
+    """pandas vs Arrow results for a multi-season pbp projection"""
+    print("Arrow results: week/yards for every rush and pass, all seasons")
+    sql = """
+        SELECT season, week, yards_gained, rush_attempt, pass_attempt
+        FROM pbp
+        WHERE rush_attempt = 1 OR pass_attempt = 1
+    """
+
+    def pandas_columns():
+        df = query_engine.query_parquet(sql, cache=False)
+        return df["week"].to_numpy(), df["yards_gained"].to_numpy()
+
+    def arrow_columns():
+        table = query_engine.query_parquet(sql, cache=False, output="arrow")
+        cols = query_engine.arrow_columns(table, "week", "yards_gained")
+        return cols["week"], cols["yards_gained"]
+
+    report("pandas -> numpy", timed(pandas_columns, max(1, repeat // 10)))
+    report("arrow -> numpy", timed(arrow_columns, max(1, repeat // 10)))
+
+    df = query_engine.query_parquet(sql, cache=False)
+    table = query_engine.query_parquet(sql, cache=False, output="arrow")
+    print(
+        f"  materialized: pandas {df.memory_usage(deep=True).sum() / 1e6:.1f} MB,"
+        f" arrow {table.nbytes / 1e6:.1f} MB ({table.num_rows:,} rows)"
+    )
+
+
+def bench_partitions(repeat: int):
+    """Per-season pbp files vs season/week hive partitions"""
+    print("Partition pruning: pbp scans filtered on season / season+week")
+    raw = query_engine.DATA_DIR / query_engine.DATASETS["pbp"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with fixtures.loader_output(Path(tmp)) as load_nfl_data:
+            load_nfl_data.write_pbp_partitions(pl.read_parquet(raw))
+
+        sources = {
+            "season files": f"read_parquet('{raw}')",
+            "partitioned": (
+                f"read_parquet('{tmp}/{load_nfl_data.PBP_PARTITION_DIR}/**/*.parquet',"
+                f" hive_partitioning = true, hive_types = {query_engine.HIVE_TYPES})"
+            ),
+        }
+        filters = {
+            "season": "season = 2024",
+            "season+week": "season = 2024 AND week = 5",
+        }
+        for filter_label, where in filters.items():
+            for source_label, source in sources.items():
+                sql = f"""
+                    SELECT posteam, SUM(yards_gained) AS yards, COUNT(*) AS plays
+                    FROM {source}
+                    WHERE {where}
+                    GROUP BY posteam
+                """
+                report(
+                    f"{source_label}, {filter_label}",
+                    timed(lambda: query_engine.query_parquet(sql, cache=False), repeat),
+                )
+
+
+def bench_slim(repeat: int):
+    """Raw pbp dump vs the slim projection pages read"""
+    print("Slim pbp: file size, full load into pandas, and a player query")
+    raw = query_engine.DATA_DIR / query_engine.DATASETS["pbp"]
+    player_id = fixtures.player_ids("KC")[2]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        slim = query_engine.DATA_DIR / query_engine.DATASETS["pbp_slim"]
+        if not list(slim.parent.glob(slim.name)):
+            with fixtures.loader_output(Path(tmp)) as load_nfl_data, quiet():
+                load_nfl_data.write_slim_pbp(pl.read_parquet(raw))
+            slim = Path(tmp) / slim.name
+
+        for label, path in (("raw", raw), ("slim", slim)):
+            files = sorted(path.parent.glob(path.name))
+            columns = len(pq.read_schema(files[0]))
+            size = sum(file.stat().st_size for file in files)
+            print(f"  {label:<5} {size / 1e6:8.1f} MB on disk" f"   {columns} columns")
+        for label, path in (("raw", raw), ("slim", slim)):
+            files = sorted(path.parent.glob(path.name))
+            report(
+                f"{label}: pd.read_parquet",
+                timed(lambda: pq.read_table(files).to_pandas(), max(1, repeat // 40)),
+            )
+        for label, path in (("raw", raw), ("slim", slim)):
+            sql = f"""
+                SELECT week, SUM(rush_attempt) AS rushes,
+                       SUM(pass_attempt) AS targets, SUM(yards_gained) AS yards
+                FROM read_parquet('{path}')
+                WHERE rusher_id = ? OR receiver_id = ?
+                GROUP BY week
+                ORDER BY week
+            """
+            report(
+                f"{label}: player weekly query",
+                timed(
+                    lambda: query_engine.query_parquet(
+                        sql, [player_id, player_id], cache=False
+                    ),
+                    repeat,
+                ),
+            )
+
+
+def bench_row_groups(repeat: int):
+    """Row groups skipped for dashboard filters, by slim pbp file layout"""
+    print("Row-group pruning: slim pbp layouts under typical dashboard filters")
+    player_id = fixtures.player_ids("KC")[2]
+    player = f"(rusher_id = '{player_id}' OR receiver_id = '{player_id}')"
+    filters = {
+        "season": ("season = 2024", [{"season": 2024}]),
+        "season + team": (
+            "season = 2024 AND posteam = 'KC'",
+            [{"season": 2024, "posteam": "KC"}],
+        ),
+        "season + week": ("season = 2024 AND week = 5", [{"season": 2024, "week": 5}]),
+        "player": (player, [{"rusher_id": player_id}, {"receiver_id": player_id}]),
+        "season + team + player": (
+            f"season = 2024 AND posteam = 'KC' AND {player}",
+            [
+                {"season": 2024, "posteam": "KC", "rusher_id": player_id},
+                {"season": 2024, "posteam": "KC", "receiver_id": player_id},
+            ],
+        ),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with fixtures.loader_output(Path(tmp)) as load_nfl_data, quiet():
+            # Download order: season, game, play
+            pbp = pl.read_parquet(query_engine.DATA_DIR / query_engine.DATASETS["pbp"])
+            pbp = pbp.sort(["season", "game_id", "play_id"])
+            table = load_nfl_data.slim_pbp(pbp.to_arrow())
+
+            layouts = {
+                "previous (1 row group)": Path(tmp) / "default.parquet",
+                "small row groups": Path(tmp) / "row_groups.parquet",
+                "season files, sorted": Path(tmp)
+                / load_nfl_data.PBP_SLIM_FILE.format(season="*"),
+            }
+            pq.write_table(table, layouts["previous (1 row group)"])
+            with load_nfl_data._parquet_writer(
+                layouts["small row groups"], table.schema
+            ) as writer:
+                writer.write_table(
+                    table, row_group_size=load_nfl_data.PARQUET_ROW_GROUP_SIZE
+                )
+            load_nfl_data.write_slim_pbp(pbp)
+
+        for label, path in layouts.items():
+            files = sorted(path.parent.glob(path.name))
+            footers = [pq.ParquetFile(file).metadata for file in files]
+            row_groups = sum(metadata.num_row_groups for metadata in footers)
+            size = sum(file.stat().st_size for file in files)
+            print(f"  {label}: {row_groups} row groups, {size / 1e6:.1f} MB")
+            for filter_label, (where, conditions) in filters.items():
+                read = sum(
+                    _row_groups_matching(metadata, conditions) for metadata in footers
+                )
+                sql = f"""
+                    SELECT COUNT(*) AS plays, SUM(yards_gained) AS yards
+                    FROM read_parquet('{path}')
+                    WHERE {where}
+                """
+                samples = timed(
+                    lambda: query_engine.query_parquet(sql, cache=False), repeat
+                )
+                print(
+                    f"    {filter_label:<24} reads {read:>3} of"
+                    f" {row_groups:<3} p50"
+                    f" {statistics.median(samples):7.3f} ms"
+                )
+
+
+def bench_player_index(repeat: int):
+    """Player lookups by pbp size: boolean scans vs the player index"""
+    print("Player lookups: one player's plays as pbp grows around them")
+    print("  (the pandas mask needs all of pbp held in memory by every worker)")
+    player_id = fixtures.player_ids("KC")[2]
+    data_dir = query_engine.DATA_DIR
+
+    for count in (1, 4, 16):
+        seasons = list(range(2025 - count + 1, 2026))
+        # Earlier seasons get their own player ids, so the file grows while
+        # the looked-up player keeps the same plays
+        pbp = fixtures.make_pbp(seasons).with_columns(
+            pl.when(pl.col("season") == seasons[-1])
+            .then(pl.col(column))
+            .otherwise(pl.col(column) + "_" + pl.col("season").cast(pl.Utf8))
+            .alias(column)
+            for column in ("rusher_id", "receiver_id")
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            with fixtures.loader_output(Path(tmp)) as load_nfl_data, quiet():
+                load_nfl_data.write_slim_pbp(pbp)
+            query_engine.DATA_DIR = Path(tmp)
+            query_engine.close_pool()
+            try:
+                frame = pq.read_table(
+                    sorted(
+                        Path(tmp).glob(load_nfl_data.PBP_SLIM_FILE.format(season="*"))
+                    )
+                ).to_pandas()
+                plays = len(fantasy_data.player_plays(player_id))
+                print(
+                    f"  {count:>2} seasons: {len(frame):,} plays,"
+                    f" {plays} for the player"
+                )
+                report(
+                    "    pandas boolean mask",
+                    timed(
+                        lambda: frame[
+                            (frame["rusher_id"] == player_id)
+                            | (frame["receiver_id"] == player_id)
+                        ],
+                        repeat,
+                    ),
+                )
+                report(
+                    "    duckdb pbp_slim scan",
+                    timed(
+                        lambda: query_engine.query_parquet(
+                            "SELECT * FROM pbp_slim"
+                            " WHERE rusher_id = ? OR receiver_id = ?",
+                            [player_id, player_id],
+                            cache=False,
+                        ),
+                        repeat,
+                    ),
+                )
+                report(
+                    "    player index",
+                    timed(lambda: fantasy_data.player_plays(player_id), repeat),
+                )
+            finally:
+                query_engine.DATA_DIR = data_dir
+                query_engine.close_pool()
+
+
+def bench_player_seasons(repeat: int):
+    """Fantasy page player lookups: all seasons vs season-scoped reads"""
+    print("Player seasons: weekly series and rush plays for the fantasy page")
+    player_id = fixtures.player_ids("KC")[2]
+    columns = ["season", "week", "yards_gained", "rush_attempt"]
+    weekly_sql = """
+        SELECT season, week, SUM(snaps) AS snaps, SUM(targets) AS targets,
+               SUM(rushes) AS rushes, SUM(rush_yards) AS rush_yards
+        FROM player_weeks
+        WHERE player_id = ? AND season BETWEEN ? AND ?
+        GROUP BY season, week
+    """
+
+    def lookup(seasons=None):
+        first, last = (min(seasons), max(seasons)) if seasons else (0, 9999)
+        query_engine.query_parquet(weekly_sql, [player_id, first, last], cache=False)
+        return fantasy_data.player_plays(player_id, columns, seasons=seasons)
+
+    _, by_season = fantasy_data._player_index.lookup(
+        player_id, fantasy_data.PLAYER_ID_COLUMNS
+    )
+    total = sum(len(by_group) for by_group in by_season.values())
+    for seasons in ([2025], [2023, 2024, 2025]):
+        read = sum(len(by_season.get(season, {})) for season in seasons)
+        print(
+            f"  seasons {seasons}: reads {read} of the player's" f" {total} row groups"
+        )
+
+    report("all seasons (previous)", timed(lookup, repeat))
+    report("one season", timed(lambda: lookup([2025]), repeat))
+    report(
+        "3 seasons, one query per season",
+        timed(lambda: [lookup([season]) for season in (2023, 2024, 2025)], repeat),
+    )
+    report("3 seasons, one query", timed(lambda: lookup([2023, 2024, 2025]), repeat))
+
+
+def bench_roster_options(repeat: int):
+    """Fantasy player dropdown: filtering rosters vs the roster index"""
+    print("Roster options: player dropdown for a (season, team, position)")
+    rosters = pd.read_parquet(query_engine.DATA_DIR / "nfl_rosters.parquet")
+    year, team, pos = int(rosters["season"].max()), "KC", "WR"
+    sql = "SELECT * FROM rosters WHERE season = ? AND team = ? AND position = ?"
+
+    def options(players):
+        players = players[["full_name", "gsis_id"]].drop_duplicates()
+        return [
+            {"label": n, "value": pid}
+            for n, pid in zip(players["full_name"], players["gsis_id"])
+        ]
+
+    report(
+        "pandas filter (original page)",
+        timed(
+            lambda: options(
+                rosters[
+                    (rosters["season"] == year)
+                    & (rosters["team"] == team)
+                    & (rosters["position"] == pos)
+                ]
+            ),
+            repeat,
+        ),
+    )
+    report(
+        "duckdb query (previous)",
+        timed(
+            lambda: options(
+                query_engine.query_parquet(sql, [year, team, pos], cache=False)
+            ),
+            repeat,
+        ),
+    )
+    report(
+        "roster index",
+        timed(
+            lambda: fantasy_data.roster_options().players.get((year, team, pos), []),
+            repeat,
+        ),
+    )
+
+
+def bench_fantasy_charts(repeat: int):
+    """Fantasy chart data: filtering plays in pandas vs player_week_stats()"""
+    print("Fantasy charts: every series the four player charts show")
+    seasons = [2023, 2024, 2025]
+    slim = pq.read_table(query_engine._dataset_files("pbp_slim")).to_pandas()
+    slim = slim[slim["season"].isin(seasons)]
+
+    def from_plays(player_id):
+        # The original page: the player's plays (each once, whatever roles
+        # they had in it), grouped by week, then the per-chart columns
+        plays = slim[
+            (slim["rusher_id"] == player_id) | (slim["receiver_id"] == player_id)
+        ]
+        yards = plays["yards_gained"].fillna(0)
+        plays = plays.assign(
+            rush_yards=yards.where(plays["rush_attempt"] == 1, 0),
+            rec_yards=yards.where(plays["complete_pass"] == 1, 0),
+        )
+        weekly = (
+            plays.groupby(["season", "week"])
+            .agg(
+                snaps=("play_id", "size"),
+                targets=("pass_attempt", "sum"),
+                rushes=("rush_attempt", "sum"),
+                completions=("complete_pass", "sum"),
+                rush_yards=("rush_yards", "sum"),
+                rec_yards=("rec_yards", "sum"),
+            )
+            .reset_index()
+        )
+        weekly["incompletions"] = weekly["targets"] - weekly["completions"]
+        weekly["catch_pct"] = (weekly["completions"] / weekly["targets"] * 100).where(
+            weekly["targets"] > 0
+        )
+        weekly["total_yards"] = weekly["rush_yards"] + weekly["rec_yards"]
+        rushes = plays[plays["rush_attempt"] == 1].sort_values(
+            ["season", "week"], kind="stable"
+        )
+        return weekly, rushes[["season", "week", "yards_gained"]]
+
+    # Equivalence: same series and rush yards for every fixture player,
+    # including plays that name a player as both rusher and receiver
+    both = (slim["rusher_id"] == slim["receiver_id"]).sum()
+    assert both, "fixture has no plays naming one player in two roles"
+    players = [p for team in fixtures.TEAMS for p in fixtures.player_ids(team)]
+    for player_id in [*players, "nobody"]:
+        expected, expected_rushes = from_plays(player_id)
+        weekly, rushes = fantasy_data.player_week_stats(player_id, seasons)
+        pd.testing.assert_frame_equal(
+            weekly, expected[weekly.columns], check_dtype=False
+        )
+        pd.testing.assert_frame_equal(
+            rushes.reset_index(drop=True),
+            expected_rushes.reset_index(drop=True),
+            check_dtype=False,
+        )
+    print(
+        f"  {len(players) + 1} players match the original computation"
+        f" ({both:,} plays name one player in two roles)"
+    )
+
+    player_id = fixtures.player_ids("KC")[2]
+    report("pandas over preloaded plays", timed(lambda: from_plays(player_id), repeat))
+    report(
+        "player_week_stats",
+        timed(lambda: fantasy_data.player_week_stats(player_id, seasons), repeat),
+    )
+
+
+def _row_groups_matching(metadata, conditions) -> int:
+    """
+    Row groups whose min/max statistics can't rule out a filter, i.e. the
+    ones a reader has to scan. conditions is a list of {column: value}
+    equalities, OR-ed together.
+    """
+    columns = {metadata.schema.column(i).name: i for i in range(metadata.num_columns)}
+
+    def may_match(row_group, condition):
+        for column, value in condition.items():
+            stats = row_group.column(columns[column]).statistics
+            if stats is not None and stats.has_min_max:
+                if not stats.min <= value <= stats.max:
+                    return False
+        return True
+
+    return sum(
+        any(may_match(metadata.row_group(i), c) for c in conditions)
+        for i in range(metadata.num_row_groups)
+    )
+
+
+def quiet():
+    """Hide the loader's progress output"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_single_flight(repeat: int):
+    """A burst of identical page-load queries with and without coalescing"""
+    users = 32
+    print(f"Single flight: {users} users open Team Offense Trends at once")
+    queries = [
+        ("SELECT DISTINCT posteam FROM team_games ORDER BY 1", None),
+        ("SELECT DISTINCT season FROM team_games ORDER BY 1 DESC", None),
+        (
+            "SELECT posteam, SUM(yards_gained) AS yards FROM pbp"
+            " WHERE season = ? GROUP BY posteam",
+            [2024],
+        ),
+    ]
+
+    def page_load(_):
+        for sql, params in queries:
+            query_engine.query_parquet(sql, params)
+
+    for enabled in (False, True):
+        query_engine.configure_single_flight(enabled)
+        samples = []
+        executions = 0
+        for _ in range(max(1, repeat // 20)):
+            # Cold cache each round, as right after a data reload
+            query_engine.clear_cache()
+            query_engine.reset_query_stats()
+            with ThreadPoolExecutor(max_workers=users) as executor:
+                start = time.perf_counter()
+                list(executor.map(page_load, range(users)))
+                samples.append((time.perf_counter() - start) * 1000)
+            executions += query_engine.single_flight_stats()["executions"]
+
+        label = "coalesced" if enabled else "every caller executes"
+        report(f"{label} (burst)", samples)
+        if enabled:
+            print(
+                f"  executions per burst: {executions / len(samples):.1f}"
+                f" of {users * len(queries)} calls"
+            )
+
+    query_engine.configure_single_flight()
+
+
+# Running EPA through each team game plus a season-wide yardage rank: two
+# window sorts over every play, the kind of query that outgrows memory
+HEAVY_PBP_SQL = """
+    SELECT game_id, posteam, MAX(cum_epa) AS best_epa, MAX(yards_rank) AS plays
+    FROM (
+        SELECT
+            game_id,
+            posteam,
+            SUM(epa) OVER (
+                PARTITION BY game_id, posteam ORDER BY play_id
+            ) AS cum_epa,
+            RANK() OVER (
+                PARTITION BY season ORDER BY yards_gained DESC, play_id
+            ) AS yards_rank
+        FROM pbp
+    )
+    GROUP BY ALL
+    ORDER BY best_epa DESC
+    LIMIT 10
+"""
+STRESS_QUERIES = 4
+
+
+def bench_resources(repeat: int):
+    """Concurrent heavy pbp aggregations with and without a memory limit"""
+    print(f"Resource limits: {STRESS_QUERIES} concurrent window aggregations over pbp")
+    # Label, resource class, memory limit, whether every query must succeed
+    cases = [
+        ("default pool, 1GB limit", "default", "1GB", True),
+        ("default pool, 96MB limit", "default", "96MB", False),
+        ("default pool, 32MB limit", "default", "32MB", False),
+        ("heavy pool, 32MB limit", "heavy", "32MB", True),
+    ]
+    saved = copy.deepcopy(query_engine.RESOURCE_CLASSES)
+
+    for label, resources, memory_limit, must_succeed in cases:
+        pool = query_engine.configure_pool(
+            resources=resources, memory_limit=memory_limit
+        )
+        assert query_engine.get_pool(resources) is pool
+        with pool.cursor() as conn:
+            applied_limit, applied_threads = conn.execute(
+                "SELECT current_setting('memory_limit'), current_setting('threads')"
+            ).fetchone()
+        # DuckDB reports the limit rounded, in binary units (32MB -> "30.5 MiB")
+        expected = _size_bytes(memory_limit)
+        assert abs(_size_bytes(applied_limit) - expected) <= 0.01 * expected, (
+            label,
+            applied_limit,
+        )
+        assert int(applied_threads) == pool.threads, (label, applied_threads)
+        peak = {"memory_bytes": 0, "temp_bytes": 0}
+        done = threading.Event()
+
+        def sample():
+            while not done.is_set():
+                try:
+                    usage = pool.usage()
+                except duckdb.OutOfMemoryException:
+                    continue
+                for key in peak:
+                    peak[key] = max(peak[key], usage[key])
+                done.wait(0.01)
+
+        def run(_):
+            try:
+                query_engine.query_parquet(
+                    HEAVY_PBP_SQL, cache=False, resources=resources
+                )
+                return None
+            except duckdb.OutOfMemoryException:
+                return "out of memory"
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=STRESS_QUERIES) as executor:
+            errors = [e for e in executor.map(run, range(STRESS_QUERIES)) if e]
+        elapsed = (time.perf_counter() - start) * 1000
+        done.set()
+        sampler.join()
+
+        print(
+            f"  {label:<28} {elapsed:8.0f} ms"
+            f"   peak memory {peak['memory_bytes'] / 1e6:6.0f} MB"
+            f"   spilled {peak['temp_bytes'] / 1e6:6.0f} MB"
+            f"   failed {len(errors)}/{STRESS_QUERIES}"
+        )
+        assert not (must_succeed and errors), f"{label}: {len(errors)} queries failed"
+
+    query_engine.RESOURCE_CLASSES.clear()
+    query_engine.RESOURCE_CLASSES.update(saved)
+    query_engine.close_pool()
+    print("  limits applied to each pool; the 1GB and heavy pools ran every query")
+
+
+def _size_bytes(size: str) -> float:
+    """Bytes in a DuckDB size such as 32MB or 30.5 MiB"""
+    units = {"B": 1, "KB": 1e3, "MB": 1e6, "GB": 1e9, "TB": 1e12}
+    units.update({"KIB": 2**10, "MIB": 2**20, "GIB": 2**30, "TIB": 2**40})
+    number, unit = re.fullmatch(r"\s*([\d.]+)\s*([A-Za-z]+)\s*", size).groups()
+    return float(number) * units[unit.upper()]
+
+
+STARTUP_SCRIPT = """
+import inspect, sys, time
+from pathlib import Path
+start = time.perf_counter()
+from utils import query_engine
+query_engine.DATA_DIR = Path(sys.argv[1])
+import app
+startup_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+import pages.fantasy_value as page
+page.layout() if callable(page.layout) else page.layout
+# Revisions before season-scoped views take only the player
+params = inspect.signature(page.update_player_viz).parameters
+page.update_player_viz(sys.argv[2], *[int(sys.argv[3])][: len(params) - 1])
+visit_ms = (time.perf_counter() - start) * 1000
+status = dict(line.split(":", 1) for line in open("/proc/self/status"))
+print(startup_ms, visit_ms, int(status["VmRSS"].split()[0]), int(status["VmHWM"].split()[0]))
+"""
+
+
+def bench_startup(repeat: int):
+    """App import time and memory in a fresh worker process"""
+    print("Startup: fresh process importing app.py (every page module)")
+    repo = Path(__file__).resolve().parent.parent
+    rosters = query_engine.DATA_DIR / "nfl_rosters.parquet"
+    season = pq.read_table(rosters, columns=["season"])["season"].to_numpy().max()
+    samples = []
+    for _ in range(max(1, repeat // 40)):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                STARTUP_SCRIPT,
+                str(query_engine.DATA_DIR),
+                fixtures.player_ids("KC")[2],
+                str(season),
+            ],
+            cwd=repo,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append([float(value) for value in result.stdout.split()[-4:]])
+    startup_ms, visit_ms, rss_kb, peak_kb = (
+        statistics.median(s) for s in zip(*samples)
+    )
+    print(f"  import app                {startup_ms:8.0f} ms")
+    print(f"  first Fantasy Value visit {visit_ms:8.0f} ms   (layout + one player)")
+    print(
+        f"  worker RSS                {rss_kb / 1024:8.0f} MB   (peak {peak_kb / 1024:.0f} MB)"
+    )
+
+
+SCENARIOS = {
+    "pool": bench_pool,
+    "cache": bench_cache,
+    "prepared": bench_prepared,
+    "arrow": bench_arrow,
+    "partitions": bench_partitions,
+    "slim": bench_slim,
+    "row_groups": bench_row_groups,
+    "player_index": bench_player_index,
+    "player_seasons": bench_player_seasons,
+    "roster_options": bench_roster_options,
+    "fantasy_charts": bench_fantasy_charts,
+    "resources": bench_resources,
+    "single_flight": bench_single_flight,
+    "startup": bench_startup,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", choices=[[], *SCENARIOS])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--data-dir", type=Path, help="Use existing parquet files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.data_dir:
+            data_dir = args.data_dir
+        else:
+            data_dir = Path(tmp)
+            print(f"Writing synthetic data to {data_dir}...")
+            fixtures.write_dataset(data_dir)
+
+        query_engine.DATA_DIR = data_dir
+        query_engine.close_pool()
+
+        for name in args.scenarios or SCENARIOS:
+            SCENARIOS[name](args.repeat)
+            print()
+
+        query_engine.close_pool()
+
+
+if __name__ == "__main__":
+    main()
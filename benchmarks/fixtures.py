@@ -0,0 +1,162 @@
+"""
+Synthetic NFL datasets for benchmarks.
+
+Builds play-by-play, team, and roster frames shaped like the nflreadpy
+output (same column names and dtypes for the columns our pages use), so
+benchmarks can run without downloading real data.
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+import polars as pl
+
+TEAMS = [
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE",
+    "DAL", "DEN", "DET", "GB", "HOU", "IND", "JAX", "KC",
+    "LA", "LAC", "LV", "MIA", "MIN", "NE", "NO", "NYG",
+    "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+]  # fmt: skip
+
+WEEKS = 18
+PLAYS_PER_TEAM_GAME = 65
+PLAYERS_PER_TEAM = 12
+# Extra numeric columns so the raw file is about as wide as the real one
+PADDING_COLUMNS = 60
+
+
+def player_ids(team: str) -> list:
+    """Deterministic gsis-style ids for a team's skill players"""
+    return [f"00-{team}{i:04d}" for i in range(PLAYERS_PER_TEAM)]
+
+
+def make_pbp(seasons=(2022, 2023, 2024, 2025), weeks=WEEKS, seed=0) -> pl.DataFrame:
+    """Generate play-by-play rows for every team, week, and season"""
+    rng = np.random.default_rng(seed)
+    frames = []
+
+    for season in seasons:
+        for week in range(1, weeks + 1):
+            order = rng.permutation(len(TEAMS))
+            for home, away in zip(order[::2], order[1::2]):
+                game_id = f"{season}_{week:02d}_{TEAMS[away]}_{TEAMS[home]}"
+                for posteam, defteam in ((home, away), (away, home)):
+                    frames.append(
+                        _team_game_plays(
+                            rng, game_id, season, week, TEAMS[posteam], TEAMS[defteam]
+                        )
+                    )
+
+    pbp = pl.concat(frames)
+    return pbp.with_columns(pl.int_range(0, pbp.height).alias("play_id"))
+
+
+def _team_game_plays(rng, game_id, season, week, posteam, defteam):
+    n = PLAYS_PER_TEAM_GAME
+    is_pass = rng.random(n) < 0.55
+    is_rush = ~is_pass & (rng.random(n) < 0.85)
+    complete = is_pass & (rng.random(n) < 0.65)
+    yards = np.where(
+        complete,
+        rng.integers(0, 40, n),
+        np.where(is_rush, rng.integers(-3, 20, n), 0),
+    )
+    ids = np.array(player_ids(posteam))
+    players = ids[rng.integers(0, len(ids), n)]
+
+    columns = {
+        "game_id": [game_id] * n,
+        "season": np.full(n, season, dtype=np.int32),
+        "week": np.full(n, week, dtype=np.int32),
+        "posteam": [posteam] * n,
+        "defteam": [defteam] * n,
+        "play_type": np.where(is_pass, "pass", np.where(is_rush, "run", "punt")),
+        "yards_gained": yards.astype(np.float64),
+        "pass_attempt": is_pass.astype(np.float64),
+        "rush_attempt": is_rush.astype(np.float64),
+        "complete_pass": complete.astype(np.float64),
+        "first_down": (yards >= 10).astype(np.float64),
+        "interception": (is_pass & ~complete & (rng.random(n) < 0.05)).astype(
+            np.float64
+        ),
+        "fumble_lost": (is_rush & (rng.random(n) < 0.01)).astype(np.float64),
+        "touchdown": (rng.random(n) < 0.04).astype(np.float64),
+        "posteam_score": np.cumsum(rng.integers(0, 2, n) * 3).astype(np.float64),
+        "rusher_id": np.where(is_rush, players, None).tolist(),
+        "receiver_id": np.where(is_pass, players, None).tolist(),
+        "epa": rng.normal(0, 1, n),
+    }
+    for i in range(PADDING_COLUMNS):
+        columns[f"extra_{i:02d}"] = rng.random(n)
+
+    # Trick plays: a completed pass the receiver is also credited with
+    # rushing, so one play names the same player in both id columns
+    trick = complete & (rng.random(n) < 0.03)
+    columns["rush_attempt"] = (is_rush | trick).astype(np.float64)
+    columns["rusher_id"] = np.where(is_rush | trick, players, None).tolist()
+
+    return pl.DataFrame(columns)
+
+
+def make_teams() -> pl.DataFrame:
+    """Team reference rows"""
+    return pl.DataFrame(
+        {
+            "team_abbr": TEAMS,
+            "team_name": [f"{t} Team" for t in TEAMS],
+            "team_conf": ["AFC", "NFC"] * (len(TEAMS) // 2),
+            "team_division": ["North", "South", "East", "West"] * (len(TEAMS) // 4),
+        }
+    )
+
+
+def make_rosters(seasons=(2025,)) -> pl.DataFrame:
+    """Roster rows for the skill players that appear in make_pbp()"""
+    positions = ["RB", "RB", "WR", "WR", "WR", "WR", "TE", "TE", "RB", "WR", "TE", "WR"]
+    rows = [
+        {
+            "season": season,
+            "team": team,
+            "position": positions[i],
+            "full_name": f"{team} Player {i}",
+            "football_name": f"{team} P{i}",
+            "gsis_id": pid,
+        }
+        for season in seasons
+        for team in TEAMS
+        for i, pid in enumerate(player_ids(team))
+    ]
+    return pl.DataFrame(rows)
+
+
+@contextmanager
+def loader_output(data_dir):
+    """Point utils/load_nfl_data.py at data_dir for the duration of a block"""
+    from utils import load_nfl_data
+
+    loader_dir = load_nfl_data.DATA_DIR
+    load_nfl_data.DATA_DIR = data_dir
+    try:
+        yield load_nfl_data
+    finally:
+        load_nfl_data.DATA_DIR = loader_dir
+
+
+def write_dataset(data_dir, seasons=(2022, 2023, 2024, 2025)):
+    """
+    Write the synthetic datasets into data_dir using the real loader's
+    aggregation, so derived tables match what load_nfl_data.py produces.
+    """
+    data_dir.mkdir(parents=True, exist_ok=True)
+    pbp = make_pbp(seasons)
+    make_teams().write_parquet(data_dir / "nfl_teams.parquet")
+    make_rosters(seasons[-1:]).write_parquet(data_dir / "nfl_rosters.parquet")
+
+    with loader_output(data_dir) as load_nfl_data:
+        load_nfl_data.write_roster_options()
+        load_nfl_data.write_pbp(pbp)
+        load_nfl_data.save_player_weeks(load_nfl_data.aggregate_player_weeks(pbp))
+        team_games = load_nfl_data.create_team_game_stats(pbp)
+        load_nfl_data.create_team_season_rollups(team_games)
+
+    return pbp
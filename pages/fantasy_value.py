@@ -6,19 +6,20 @@ The user selects a year, team, and position (RB, WR, TE), then a player.
 It visualizes player usage, efficiency, and yardage trends.
 """
 
+import uuid
+
 import dash
-from dash import html, dcc, callback, Input, Output
+from dash import html, dcc, callback, Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
-import os
-
-# --- Load data ---
-DATA_PATH = "data/parquet"
-pbp = pd.read_parquet(os.path.join(DATA_PATH, "nfl_pbp_raw.parquet"))
-rosters = pd.read_parquet(os.path.join(DATA_PATH, "nfl_rosters.parquet"))
-team_games = pd.read_parquet(os.path.join(DATA_PATH, "nfl_team_games.parquet"))
-teams = pd.read_parquet(os.path.join(DATA_PATH, "nfl_teams.parquet"))
+from utils.fantasy_data import player_week_stats, roster_options
+from utils.query_engine import (
+    QueryCancelled,
+    callback_key,
+    register_query,
+    run_query,
+)
 
 # --- Page registration ---
 dash.register_page(
@@ -27,89 +28,158 @@ dash.register_page(
     name="Fantasy Value",
 )
 
-# --- Filterable layout ---
-layout = html.Div(
-    [
-        html.H1("Fantasy Value Dashboard"),
-        html.P("Analyze player usage, efficiency, and yardage trends by week."),
-        html.Div(
-            [
-                html.Div(
-                    [
-                        html.Label("Select Year:"),
-                        dcc.Dropdown(
-                            id="fantasy-year",
-                            options=[
-                                {"label": str(y), "value": y}
-                                for y in sorted(
-                                    rosters["season"].unique(), reverse=True
-                                )
-                            ],
-                            value=sorted(rosters["season"].unique(), reverse=True)[0],
-                        ),
-                    ],
-                    style={
-                        "width": "20%",
-                        "display": "inline-block",
-                        "margin-right": "2%",
-                    },
-                ),
-                html.Div(
-                    [
-                        html.Label("Select Team:"),
-                        dcc.Dropdown(
-                            id="fantasy-team",
-                            options=[
-                                {"label": t, "value": t}
-                                for t in sorted(rosters["team"].unique())
-                            ],
-                        ),
-                    ],
-                    style={
-                        "width": "20%",
-                        "display": "inline-block",
-                        "margin-right": "2%",
-                    },
-                ),
-                html.Div(
-                    [
-                        html.Label("Select Position:"),
-                        dcc.Dropdown(
-                            id="fantasy-pos",
-                            options=[
-                                {"label": p, "value": p} for p in ["RB", "WR", "TE"]
-                            ],
-                        ),
-                    ],
-                    style={
-                        "width": "20%",
-                        "display": "inline-block",
-                        "margin-right": "2%",
-                    },
-                ),
-                html.Div(
-                    [
-                        html.Label("Select Player:"),
-                        dcc.Dropdown(id="fantasy-player"),
-                    ],
-                    style={"width": "30%", "display": "inline-block"},
-                ),
-            ],
-            style={"margin-bottom": "25px"},
-        ),
-        html.Hr(),
-        html.H3("Usage Overview"),
-        dcc.Graph(id="usage-graph"),
-        html.H3("Rushing Efficiency"),
-        dcc.Graph(id="rushing-efficiency-graph"),
-        html.H3("Receiving Efficiency"),
-        dcc.Graph(id="receiving-efficiency-graph"),
-        html.H3("Total Yardage"),
-        dcc.Graph(id="yardage-graph"),
-    ]
+# --- Queries ---
+# Data is read on demand through the query engine, so importing this page
+# (every app worker does at startup) loads nothing
+register_query(
+    "fantasy_seasons", "SELECT DISTINCT season FROM rosters ORDER BY season DESC"
+)
+# Seasons with play-by-play, which the charts can show
+register_query(
+    "fantasy_play_seasons",
+    "SELECT DISTINCT season FROM team_games ORDER BY season DESC",
+)
+register_query(
+    "fantasy_teams",
+    "SELECT DISTINCT team FROM rosters WHERE team IS NOT NULL ORDER BY team",
+)
+register_query(
+    "fantasy_players",
+    "SELECT * FROM rosters WHERE season = ? AND team = ? AND position = ?",
 )
 
 
+def get_available_seasons():
+    """Seasons with plays to chart, newest first"""
+    try:
+        return run_query("fantasy_play_seasons")["season"].tolist()
+    except Exception:
+        return []
+
+
+def _roster_season(year):
+    """
+    The roster season to list players from: the year's own, or the latest
+    roster when rosters weren't loaded for that year
+    """
+    options = roster_options()
+    if options is not None:
+        seasons = options.seasons
+    else:
+        seasons = run_query("fantasy_seasons")["season"].tolist()
+    return year if year in seasons or not seasons else seasons[0]
+
+
+def get_available_teams():
+    """Teams that appear in any roster"""
+    options = roster_options()
+    if options is not None:
+        return options.teams
+    try:
+        return run_query("fantasy_teams")["team"].tolist()
+    except Exception:
+        return []
+
+
+# --- Filterable layout ---
+def layout(**kwargs):
+    """Built per page visit, so the dropdowns query the data only when needed"""
+    seasons = get_available_seasons()
+    return html.Div(
+        [
+            html.H1("Fantasy Value Dashboard"),
+            # Identifies this browser tab, so its queries only cancel each other
+            dcc.Store(id="fantasy-tab-id", data=str(uuid.uuid4())),
+            html.P("Analyze player usage, efficiency, and yardage trends by week."),
+            html.Div(
+                [
+                    html.Div(
+                        [
+                            html.Label("Select Year:"),
+                            dcc.Dropdown(
+                                id="fantasy-year",
+                                options=[
+                                    {"label": str(y), "value": y} for y in seasons
+                                ],
+                                value=seasons[0] if seasons else None,
+                            ),
+                        ],
+                        style={
+                            "width": "20%",
+                            "display": "inline-block",
+                            "margin-right": "2%",
+                        },
+                    ),
+                    html.Div(
+                        [
+                            html.Label("Select Team:"),
+                            dcc.Dropdown(
+                                id="fantasy-team",
+                                options=[
+                                    {"label": t, "value": t}
+                                    for t in get_available_teams()
+                                ],
+                            ),
+                        ],
+                        style={
+                            "width": "20%",
+                            "display": "inline-block",
+                            "margin-right": "2%",
+                        },
+                    ),
+                    html.Div(
+                        [
+                            html.Label("Select Position:"),
+                            dcc.Dropdown(
+                                id="fantasy-pos",
+                                options=[
+                                    {"label": p, "value": p} for p in ["RB", "WR", "TE"]
+                                ],
+                            ),
+                        ],
+                        style={
+                            "width": "20%",
+                            "display": "inline-block",
+                            "margin-right": "2%",
+                        },
+                    ),
+                    html.Div(
+                        [
+                            html.Label("Select Player:"),
+                            dcc.Dropdown(id="fantasy-player"),
+                        ],
+                        style={"width": "30%", "display": "inline-block"},
+                    ),
+                    html.Div(
+                        [
+                            html.Label("Compare Seasons:"),
+                            dcc.Dropdown(
+                                id="fantasy-compare",
+                                options=[
+                                    {"label": str(y), "value": y} for y in seasons
+                                ],
+                                multi=True,
+                                placeholder="Selected year only",
+                            ),
+                        ],
+                        style={"width": "42%", "margin-top": "15px"},
+                    ),
+                ],
+                style={"margin-bottom": "25px"},
+            ),
+            html.Hr(),
+            html.H3("Usage Overview"),
+            dcc.Graph(id="usage-graph"),
+            html.H3("Rushing Efficiency"),
+            dcc.Graph(id="rushing-efficiency-graph"),
+            html.H3("Receiving Efficiency"),
+            dcc.Graph(id="receiving-efficiency-graph"),
+            html.H3("Total Yardage"),
+            dcc.Graph(id="yardage-graph"),
+        ]
+    )
+
+
 # --- Callbacks ---
 
 
@@ -118,17 +188,29 @@ layout = html.Div(
     Input("fantasy-year", "value"),
     Input("fantasy-team", "value"),
     Input("fantasy-pos", "value"),
+    State("fantasy-tab-id", "data"),
 )
-def update_player_dropdown(year, team, pos):
+def update_player_dropdown(year, team, pos, tab_id=None):
     if not (year and team and pos):
         return []
+    year = _roster_season(year)
 
-    # Use the correct name column(s)
-    name_col = "full_name" if "full_name" in rosters.columns else "football_name"
+    # Ready-made options from the loader's roster index, when it is current
+    options = roster_options()
+    if options is not None:
+        return options.players.get((year, team, pos), [])
 
-    players = rosters.query("season == @year and team == @team and position == @pos")[
-        [name_col, "gsis_id"]
-    ].drop_duplicates()
+    try:
+        players = run_query(
+            "fantasy_players", [year, team, pos], cancel_key=callback_key(tab_id)
+        )
+    except QueryCancelled:
+        # A newer selection replaced this request
+        raise PreventUpdate
+
+    # Use the correct name column(s)
+    name_col = "full_name" if "full_name" in players.columns else "football_name"
+    players = players[[name_col, "gsis_id"]].drop_duplicates()
 
     # Build dropdown options
     return [
@@ -137,6 +219,11 @@ def update_player_dropdown(year, team, pos):
     ]
 
 
+def _trace_name(name, season, compare):
+    """Label traces by season when several seasons share a figure"""
+    return f"{name} {season}" if compare else name
+
+
 # Main graph callback
 @callback(
     Output("usage-graph", "figure"),
@@ -144,45 +231,50 @@ def update_player_dropdown(year, team, pos):
     Output("receiving-efficiency-graph", "figure"),
     Output("yardage-graph", "figure"),
     Input("fantasy-player", "value"),
+    Input("fantasy-year", "value"),
+    Input("fantasy-compare", "value"),
+    State("fantasy-tab-id", "data"),
 )
-def update_player_viz(player_id):
-    if not player_id:
+def update_player_viz(player_id, year, compare_seasons=None, tab_id=None):
+    # The selected year plus any seasons picked for comparison
+    seasons = sorted({year, *(compare_seasons or [])} - {None})
+    if not (player_id and seasons):
         empty_fig = go.Figure().update_layout(title="Select a player to view data")
         return empty_fig, empty_fig, empty_fig, empty_fig
+    compare = len(seasons) > 1
 
-    # Filter player-level data
-    df = pbp.query("rusher_id == @player_id or receiver_id == @player_id").copy()
-    if df.empty:
+    # Every series the four charts show, in one call
+    try:
+        weekly, rush_df = player_week_stats(
+            player_id, seasons, cancel_key=callback_key(tab_id)
+        )
+    except QueryCancelled:
+        # A newer player selection replaced this request
+        raise PreventUpdate
+    if weekly.empty:
         empty_fig = go.Figure().update_layout(
             title="No data available for this player."
         )
         return empty_fig, empty_fig, empty_fig, empty_fig
-
-    df["week"] = df["week"].astype(int)
-    df.sort_values("week", inplace=True)
+    rush_df["season"] = rush_df["season"].astype(str)
+    by_season = weekly.groupby("season", sort=True)
 
     # === USAGE GRAPH ===
     # (for simplicity, use dummy "snap" data approximation)
-    usage = (
-        df.groupby("week")
-        .agg(
-            total_targets=("pass_attempt", "sum"),
-            total_rushes=("rush_attempt", "sum"),
-            total_snaps=("play_id", "count"),
-        )
-        .reset_index()
-    )
-
     fig_usage = go.Figure()
-    fig_usage.add_trace(
-        go.Scatter(x=usage["week"], y=usage["total_snaps"], name="Snaps")
-    )
-    fig_usage.add_trace(
-        go.Scatter(x=usage["week"], y=usage["total_targets"], name="Targets")
-    )
-    fig_usage.add_trace(
-        go.Scatter(x=usage["week"], y=usage["total_rushes"], name="Rushes")
-    )
+    for season, season_weeks in by_season:
+        for column, name in (
+            ("snaps", "Snaps"),
+            ("targets", "Targets"),
+            ("rushes", "Rushes"),
+        ):
+            fig_usage.add_trace(
+                go.Scatter(
+                    x=season_weeks["week"],
+                    y=season_weeks[column],
+                    name=_trace_name(name, season, compare),
+                )
+            )
     fig_usage.update_layout(
         title="Player Usage by Week",
         xaxis_title="Week",
@@ -191,56 +283,50 @@ def update_player_viz(player_id):
     )
 
     # === RUSHING EFFICIENCY ===
-    rush_df = df[df["rush_attempt"] == 1]
     fig_rush = px.box(
         rush_df,
         x="week",
         y="yards_gained",
+        color="season" if compare else None,
         points="all",
         title="Rushing Efficiency (Yards per Rush)",
     )
     fig_rush.update_layout(template="plotly_white")
 
     # === RECEIVING EFFICIENCY ===
-    rec_df = df[df["pass_attempt"] == 1]
-    if not rec_df.empty:
-        rec_week = (
-            rec_df.groupby("week")
-            .agg(
-                targets=("pass_attempt", "sum"),
-                completions=("complete_pass", "sum"),
-            )
-            .reset_index()
-        )
-        rec_week["incompletions"] = rec_week["targets"] - rec_week["completions"]
-        rec_week["catch_pct"] = rec_week["completions"] / rec_week["targets"] * 100
-
+    # Completions and incompletions stack within each season's bar group
+    rec_week = weekly[weekly["targets"] > 0]
+    if not rec_week.empty:
         fig_rec = go.Figure()
-        fig_rec.add_trace(
-            go.Bar(
-                x=rec_week["week"],
-                y=rec_week["completions"],
-                name="Completions",
-                marker_color="green",
+        for season, season_weeks in rec_week.groupby("season", sort=True):
+            fig_rec.add_trace(
+                go.Bar(
+                    x=season_weeks["week"],
+                    y=season_weeks["completions"],
+                    name=_trace_name("Completions", season, compare),
+                    marker_color="green",
+                    offsetgroup=str(season),
+                )
             )
-        )
-        fig_rec.add_trace(
-            go.Bar(
-                x=rec_week["week"],
-                y=rec_week["incompletions"],
-                name="Incompletions",
-                marker_color="red",
+            fig_rec.add_trace(
+                go.Bar(
+                    x=season_weeks["week"],
+                    y=season_weeks["incompletions"],
+                    base=season_weeks["completions"],
+                    name=_trace_name("Incompletions", season, compare),
+                    marker_color="red",
+                    offsetgroup=str(season),
+                )
             )
-        )
-        fig_rec.add_trace(
-            go.Scatter(
-                x=rec_week["week"],
-                y=rec_week["catch_pct"],
-                name="Catch %",
-                mode="lines+markers",
-                yaxis="y2",
+            fig_rec.add_trace(
+                go.Scatter(
+                    x=season_weeks["week"],
+                    y=season_weeks["catch_pct"],
+                    name=_trace_name("Catch %", season, compare),
+                    mode="lines+markers",
+                    yaxis="y2",
+                )
             )
-        )
         fig_rec.update_layout(
             title="Receiving Efficiency (Targets and Catch %)",
             xaxis_title="Week",
@@ -251,60 +337,41 @@ def update_player_viz(player_id):
                 side="right",
                 range=[0, 100],
             ),
-            barmode="stack",
+            barmode="group",
             template="plotly_white",
         )
     else:
         fig_rec = go.Figure().update_layout(title="No receiving data.")
 
-    # === TOTAL YARDAGE (fixed) ===
-    # Use play-level yards_gained and filter by rush/pass plays
-    # If your pbp uses different column names, adjust the filters/columns accordingly.
-
-    # Ensure week is integer and sorted earlier in the function
-    # df["week"] = df["week"].astype(int)
-    # df.sort_values("week", inplace=True)
-
-    # Rushing yards: sum yards_gained on rush attempts
-    if "rush_attempt" in df.columns and "yards_gained" in df.columns:
-        rush_week = (
-            df[df["rush_attempt"] == 1]
-            .groupby("week")["yards_gained"]
-            .sum()
-            .rename("rush_yards")
-        )
-    else:
-        rush_week = pd.Series(name="rush_yards", dtype=float)
-
-    # Receiving yards: typically sum yards_gained for completed passes
-    # (change condition if you want targets including incompletions)
-    if "complete_pass" in df.columns and "yards_gained" in df.columns:
-        rec_week = (
-            df[df["complete_pass"] == 1]
-            .groupby("week")["yards_gained"]
-            .sum()
-            .rename("rec_yards")
-        )
-    else:
-        rec_week = pd.Series(name="rec_yards", dtype=float)
-
-    # Combine into one DataFrame, fill missing weeks with 0
-    yard_df = pd.concat([rush_week, rec_week], axis=1).fillna(0).reset_index()
-    yard_df["total_yards"] = yard_df["rush_yards"] + yard_df["rec_yards"]
+    # === TOTAL YARDAGE ===
+    # Rushing yards on rush attempts, receiving yards on completed passes
+    yard_df = weekly[(weekly["rushes"] > 0) | (weekly["completions"] > 0)]
 
-    # Now build the figure
+    # Now build the figure, stacking each season's yards in its own group
     fig_yards = go.Figure()
-    fig_yards.add_trace(
-        go.Bar(x=yard_df["week"], y=yard_df["rush_yards"], name="Rushing Yards")
-    )
-    fig_yards.add_trace(
-        go.Bar(x=yard_df["week"], y=yard_df["rec_yards"], name="Receiving Yards")
-    )
+    for season, season_weeks in yard_df.groupby("season", sort=True):
+        fig_yards.add_trace(
+            go.Bar(
+                x=season_weeks["week"],
+                y=season_weeks["rush_yards"],
+                name=_trace_name("Rushing Yards", season, compare),
+                offsetgroup=str(season),
+            )
+        )
+        fig_yards.add_trace(
+            go.Bar(
+                x=season_weeks["week"],
+                y=season_weeks["rec_yards"],
+                base=season_weeks["rush_yards"],
+                name=_trace_name("Receiving Yards", season, compare),
+                offsetgroup=str(season),
+            )
+        )
     fig_yards.update_layout(
         title="Total Yardage by Week",
         xaxis_title="Week",
         yaxis_title="Yards",
-        barmode="stack",
+        barmode="group",
         template="plotly_white",
     )
 
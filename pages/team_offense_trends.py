@@ -5,21 +5,95 @@ First run: python utils/load_nfl_data.py
 Then this page will query the Parquet files.
 """
 
+import uuid
+
 import dash
-from dash import html, dcc, callback, Input, Output
+from dash import html, dcc, callback, Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.query_engine import query_parquet, list_available_datasets
+from utils.query_engine import (
+    QueryCancelled,
+    callback_key,
+    list_available_datasets,
+    register_query,
+    run_query,
+)
 
 dash.register_page(__name__, path="/team-offense-trends", name="Team Offense Trends")
 
+# Queries used by this page, declared once and prepared per connection
+register_query(
+    "offense_all_teams",
+    """
+    SELECT DISTINCT posteam
+    FROM team_games
+    WHERE posteam IS NOT NULL
+    ORDER BY posteam
+    """,
+)
+register_query(
+    "offense_seasons",
+    "SELECT DISTINCT season FROM team_games ORDER BY season DESC",
+)
+register_query(
+    "offense_season_teams",
+    """
+    SELECT DISTINCT posteam
+    FROM team_games
+    WHERE season = ? AND posteam IS NOT NULL
+    ORDER BY posteam
+    """,
+)
+register_query(
+    "offense_team_games",
+    """
+    SELECT
+        week,
+        passing_yards,
+        rushing_yards,
+        points,
+        total_yards,
+        turnovers,
+        first_downs
+    FROM team_games
+    WHERE season = ? AND posteam = ?
+    ORDER BY week
+    """,
+)
+register_query(
+    "offense_team_season",
+    "SELECT * FROM team_seasons WHERE season = ? AND posteam = ?",
+)
+
+SUMMARY_STATS = ["total_yards", "passing_yards", "rushing_yards", "points"]
+
+
+def get_season_summary(season, team, team_data):
+    """Season rollup row for the summary cards (precomputed by the loader)"""
+    try:
+        rollup = run_query("offense_team_season", [season, team])
+        if not rollup.empty:
+            return rollup.iloc[0]
+    except QueryCancelled:
+        raise
+    except Exception:
+        pass
+
+    # Data loaded before rollups existed: aggregate the games we already have
+    summary = {"games": len(team_data), "total_turnovers": team_data["turnovers"].sum()}
+    for stat in SUMMARY_STATS:
+        summary[f"{stat}_total"] = team_data[stat].sum()
+        summary[f"{stat}_mean"] = team_data[stat].mean()
+        summary[f"{stat}_max"] = team_data[stat].max()
+        summary[f"{stat}_min"] = team_data[stat].min()
+    return summary
+
 
 def get_available_teams():
     """Get list of teams from the data"""
     try:
-        teams_df = query_parquet(
-            "SELECT DISTINCT posteam FROM 'nfl_team_games.parquet' WHERE posteam IS NOT NULL ORDER BY posteam"
-        )
+        teams_df = run_query("offense_all_teams")
         return [{"label": team, "value": team} for team in teams_df["posteam"].tolist()]
     except:
         return [{"label": "Run load_nfl_data.py first", "value": "NONE"}]
@@ -28,9 +102,7 @@ def get_available_teams():
 def get_available_seasons():
     """Get available seasons"""
     try:
-        seasons_df = query_parquet(
-            "SELECT DISTINCT season FROM 'nfl_team_games.parquet' ORDER BY season DESC"
-        )
+        seasons_df = run_query("offense_seasons")
         return [
             {"label": str(year), "value": year}
             for year in seasons_df["season"].tolist()
@@ -39,86 +111,96 @@ def get_available_seasons():
         return [{"label": "2024", "value": 2024}]
 
 
-layout = html.Div(
-    [
-        html.H1("🏈 Team Offense Trends"),
-        html.P(
-            "Interactive dashboard using NFL offense data since 2022. "
-            "Data is pulled using `nflreadpy` which is built on top of the `nflverse` R package."
-        ),
-        # Check if data exists
-        html.Div(id="data-check", style={"margin-bottom": "20px"}),
-        html.Div(
-            [
-                html.Div(
-                    [
-                        html.Label("Select Season:"),
-                        dcc.Dropdown(
-                            id="nfl-season-dropdown",
-                            options=get_available_seasons(),
-                            value=2024,
-                        ),
-                    ],
-                    style={
-                        "width": "30%",
-                        "display": "inline-block",
-                        "margin-right": "3%",
-                    },
-                ),
-                html.Div(
-                    [
-                        html.Label("Select Team:"),
-                        dcc.Dropdown(
-                            id="nfl-team-dropdown",
-                            options=get_available_teams(),
-                            value=None,
-                        ),
-                    ],
-                    style={
-                        "width": "30%",
-                        "display": "inline-block",
-                        "margin-right": "3%",
-                    },
-                ),
-                html.Div(
-                    [
-                        html.Label("Select Stat:"),
-                        dcc.Dropdown(
-                            id="nfl-stat-dropdown",
-                            options=[
-                                {"label": "Total Yards", "value": "total_yards"},
-                                {"label": "Passing Yards", "value": "passing_yards"},
-                                {"label": "Rushing Yards", "value": "rushing_yards"},
-                                {"label": "Points Scored", "value": "points"},
-                            ],
-                            value="total_yards",
-                        ),
-                    ],
-                    style={"width": "30%", "display": "inline-block"},
-                ),
-            ],
-            style={"margin-bottom": "30px"},
-        ),
-        dcc.Graph(id="nfl-weekly-trend"),
-        html.Div(
-            [
-                html.Div(
-                    [dcc.Graph(id="nfl-stat-distribution")],
-                    style={"width": "48%", "display": "inline-block"},
-                ),
-                html.Div(
-                    [html.H4("Season Summary"), html.Div(id="nfl-summary-cards")],
-                    style={
-                        "width": "48%",
-                        "display": "inline-block",
-                        "vertical-align": "top",
-                        "padding-left": "2%",
-                    },
-                ),
-            ]
-        ),
-    ]
-)
+def layout(**kwargs):
+    """Built per page visit, so every tab gets its own tab id"""
+    return html.Div(
+        [
+            html.H1("🏈 Team Offense Trends"),
+            html.P(
+                "Interactive dashboard using NFL offense data since 2022. "
+                "Data is pulled using `nflreadpy` which is built on top of the `nflverse` R package."
+            ),
+            # Identifies this browser tab, so its queries only cancel each other
+            dcc.Store(id="offense-tab-id", data=str(uuid.uuid4())),
+            # Check if data exists
+            html.Div(id="data-check", style={"margin-bottom": "20px"}),
+            html.Div(
+                [
+                    html.Div(
+                        [
+                            html.Label("Select Season:"),
+                            dcc.Dropdown(
+                                id="nfl-season-dropdown",
+                                options=get_available_seasons(),
+                                value=2024,
+                            ),
+                        ],
+                        style={
+                            "width": "30%",
+                            "display": "inline-block",
+                            "margin-right": "3%",
+                        },
+                    ),
+                    html.Div(
+                        [
+                            html.Label("Select Team:"),
+                            dcc.Dropdown(
+                                id="nfl-team-dropdown",
+                                options=get_available_teams(),
+                                value=None,
+                            ),
+                        ],
+                        style={
+                            "width": "30%",
+                            "display": "inline-block",
+                            "margin-right": "3%",
+                        },
+                    ),
+                    html.Div(
+                        [
+                            html.Label("Select Stat:"),
+                            dcc.Dropdown(
+                                id="nfl-stat-dropdown",
+                                options=[
+                                    {"label": "Total Yards", "value": "total_yards"},
+                                    {
+                                        "label": "Passing Yards",
+                                        "value": "passing_yards",
+                                    },
+                                    {
+                                        "label": "Rushing Yards",
+                                        "value": "rushing_yards",
+                                    },
+                                    {"label": "Points Scored", "value": "points"},
+                                ],
+                                value="total_yards",
+                            ),
+                        ],
+                        style={"width": "30%", "display": "inline-block"},
+                    ),
+                ],
+                style={"margin-bottom": "30px"},
+            ),
+            dcc.Graph(id="nfl-weekly-trend"),
+            html.Div(
+                [
+                    html.Div(
+                        [dcc.Graph(id="nfl-stat-distribution")],
+                        style={"width": "48%", "display": "inline-block"},
+                    ),
+                    html.Div(
+                        [html.H4("Season Summary"), html.Div(id="nfl-summary-cards")],
+                        style={
+                            "width": "48%",
+                            "display": "inline-block",
+                            "vertical-align": "top",
+                            "padding-left": "2%",
+                        },
+                    ),
+                ]
+            ),
+        ]
+    )
 
 
 @callback(Output("data-check", "children"), Input("nfl-season-dropdown", "value"))
@@ -154,19 +236,21 @@ def check_data(season):
         )
 
 
-@callback(Output("nfl-team-dropdown", "options"), Input("nfl-season-dropdown", "value"))
-def update_teams(season):
+@callback(
+    Output("nfl-team-dropdown", "options"),
+    Input("nfl-season-dropdown", "value"),
+    State("offense-tab-id", "data"),
+)
+def update_teams(season, tab_id=None):
     """Update team list based on selected season"""
     try:
-        teams_df = query_parquet(
-            f"""
-            SELECT DISTINCT posteam 
-            FROM 'nfl_team_games.parquet' 
-            WHERE season = {season} AND posteam IS NOT NULL
-            ORDER BY posteam
-        """
+        teams_df = run_query(
+            "offense_season_teams", [season], cancel_key=callback_key(tab_id)
         )
         return [{"label": team, "value": team} for team in teams_df["posteam"].tolist()]
+    except QueryCancelled:
+        # A newer season selection replaced this request
+        raise PreventUpdate
     except Exception:
         return [{"label": "Error loading teams", "value": "NONE"}]
 
@@ -182,8 +266,9 @@ def update_teams(season):
         Input("nfl-team-dropdown", "value"),
         Input("nfl-stat-dropdown", "value"),
     ],
+    [State("offense-tab-id", "data")],
 )
-def update_dashboard(season, team, stat):
+def update_dashboard(season, team, stat, tab_id=None):
     """Update all visualizations"""
 
     # Default empty figures
@@ -202,22 +287,9 @@ def update_dashboard(season, team, stat):
         return empty_fig, empty_fig, html.P("Select a team to see stats")
 
     try:
-        # Get team's game data
-        team_data = query_parquet(
-            f"""
-            SELECT 
-                week, 
-                {stat},
-                passing_yards,
-                rushing_yards,
-                points,
-                total_yards,
-                turnovers,
-                first_downs
-            FROM 'nfl_team_games.parquet'
-            WHERE season = {season} AND posteam = '{team}'
-            ORDER BY week
-        """
+        # Get team's game data (every selectable stat is already a column)
+        team_data = run_query(
+            "offense_team_games", [season, team], cancel_key=callback_key(tab_id)
         )
 
         if team_data.empty:
@@ -258,13 +330,13 @@ def update_dashboard(season, team, stat):
         )
 
         # Summary stats
-        total_stat = team_data[stat].sum()
-        avg_stat = team_data[stat].mean()
-        max_stat = team_data[stat].max()
-        min_stat = team_data[stat].min()
+        season_summary = get_season_summary(season, team, team_data)
+        total_stat = season_summary[f"{stat}_total"]
+        avg_stat = season_summary[f"{stat}_mean"]
+        max_stat = season_summary[f"{stat}_max"]
 
-        avg_points = team_data["points"].mean()
-        total_turnovers = team_data["turnovers"].sum()
+        avg_points = season_summary["points_mean"]
+        total_turnovers = season_summary["total_turnovers"]
 
         summary = html.Div(
             [
@@ -314,7 +386,12 @@ def update_dashboard(season, team, stat):
                                 f"{int(total_turnovers)}",
                             ]
                         ),
-                        html.P([html.Strong("Games Played: "), f"{len(team_data)}"]),
+                        html.P(
+                            [
+                                html.Strong("Games Played: "),
+                                f"{int(season_summary['games'])}",
+                            ]
+                        ),
                     ]
                 ),
             ],
@@ -327,6 +404,10 @@ def update_dashboard(season, team, stat):
 
         return fig1, fig2, summary
 
+    except QueryCancelled:
+        # A newer selection replaced this request
+        raise PreventUpdate
+
     except Exception as e:
         error_fig = go.Figure()
         error_fig.add_annotation(
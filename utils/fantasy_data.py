@@ -0,0 +1,411 @@
+"""
+Data for the Fantasy Value page (pages/fantasy_value.py).
+
+Reads the files the loader derives for this page: the player id index
+over pbp_slim, the player_weeks table, and the roster dropdown options.
+Queries go through utils/query_engine.py; this module only shapes what
+the page's charts and dropdowns show.
+"""
+
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pathlib import Path
+
+from utils import query_engine
+
+# Player id index the loader writes over each season's pbp_slim file (see
+# player_plays())
+PLAYER_INDEX_FILE = "nfl_pbp_player_index_{season}.parquet"
+PLAYER_ID_COLUMNS = ("rusher_id", "receiver_id")
+# player_weeks columns player_week_stats() sums per season and week
+PLAYER_WEEK_SUMS = (
+    "snaps",
+    "targets",
+    "rushes",
+    "completions",
+    "rush_yards",
+    "rec_yards",
+)
+
+# Player dropdown options the loader writes from rosters (see roster_options())
+ROSTER_OPTIONS_FILE = "nfl_roster_options.parquet"
+
+
+class PlayerIndex:
+    """
+    The loader's player id indexes over the pbp_slim season files, held in
+    memory.
+
+    Maps player id -> id column -> [(season, row group, row positions)].
+    Reloaded when any of the files change, and unusable (lookup() returns
+    None) when a season's index is missing or was built from a different
+    pbp_slim file.
+    """
+
+    def __init__(self):
+        self._stamp = None
+        self._entries = None
+        self._metadata = None
+        self._lock = threading.Lock()
+
+    def lookup(self, player_id: str, id_columns, seasons=None) -> tuple:
+        """
+        ({season: pbp_slim footer}, {season: {row group: sorted row
+        positions}}) for the plays where player_id is in any of id_columns,
+        limited to seasons if given, or None if the index can't answer.
+        """
+        entries, metadata = self._load()
+        if entries is None or not set(id_columns) <= entries["columns"]:
+            return None
+
+        by_season = {}
+        for column in id_columns:
+            for season, row_group, rows in (
+                entries["players"].get(player_id, {}).get(column, ())
+            ):
+                if seasons is None or season in seasons:
+                    by_season.setdefault(season, {}).setdefault(row_group, []).append(
+                        rows
+                    )
+        return metadata, {
+            season: {
+                row_group: np.unique(np.concatenate(rows))
+                for row_group, rows in sorted(by_group.items())
+            }
+            for season, by_group in sorted(by_season.items())
+        }
+
+    def _load(self) -> tuple:
+        seasons = _slim_seasons()
+        files = [
+            str(query_engine.DATA_DIR / pattern.format(season=season))
+            for season in seasons
+            for pattern in (PLAYER_INDEX_FILE, query_engine.PBP_SLIM_FILE)
+        ]
+        stamp = query_engine._file_stamps(files)
+        with self._lock:
+            if stamp == self._stamp:
+                return self._entries, self._metadata
+
+        entries = metadata = None
+        if stamp and all(mtime is not None for _, mtime, _ in stamp):
+            metadata, tables = {}, []
+            for season, (index_stamp, pbp_stamp) in zip(
+                seasons, zip(stamp[::2], stamp[1::2])
+            ):
+                table = pq.read_table(index_stamp[0])
+                metadata[season] = pq.read_metadata(pbp_stamp[0])
+                # The loader records which pbp_slim file the index describes
+                built_for = table.schema.metadata or {}
+                current = {
+                    b"pbp_num_rows": str(metadata[season].num_rows).encode(),
+                    b"pbp_size_bytes": str(pbp_stamp[2]).encode(),
+                }
+                if any(built_for.get(key) != value for key, value in current.items()):
+                    break
+                tables.append((season, table))
+            else:
+                entries = self._entries_from(tables)
+
+        with self._lock:
+            self._stamp, self._entries, self._metadata = stamp, entries, metadata
+        return entries, metadata
+
+    @staticmethod
+    def _entries_from(tables: list) -> dict:
+        players = {}
+        columns = set()
+        for season, table in tables:
+            rows = table.column("rows").combine_chunks()
+            offsets = rows.offsets.to_numpy()
+            values = rows.values.to_numpy()
+            for i, (player_id, column, row_group) in enumerate(
+                zip(
+                    table.column("player_id").to_pylist(),
+                    table.column("id_column").to_pylist(),
+                    table.column("row_group").to_pylist(),
+                )
+            ):
+                players.setdefault(player_id, {}).setdefault(column, []).append(
+                    (season, row_group, values[offsets[i] : offsets[i + 1]])
+                )
+            columns.update(table.column("id_column").to_pylist())
+        return {"players": players, "columns": columns}
+
+
+_player_index = PlayerIndex()
+
+
+def _slim_seasons() -> list:
+    """Seasons with a pbp_slim file, in order"""
+    prefix, suffix = query_engine.PBP_SLIM_FILE.split("{season}")
+    names = [Path(file).name for file in query_engine._dataset_files("pbp_slim")]
+    return sorted(
+        int(name[len(prefix) : -len(suffix)])
+        for name in names
+        if name[len(prefix) : -len(suffix)].isdigit()
+    )
+
+
+def player_plays(
+    player_id: str,
+    columns: list = None,
+    id_columns=PLAYER_ID_COLUMNS,
+    seasons: list = None,
+    output: str = "pandas",
+):
+    """
+    Plays from pbp_slim where player_id is in any of id_columns.
+
+    Reads through the loader's player index: only the row groups holding
+    the player's plays are decoded and only the matching rows kept, so the
+    cost follows the player's play count rather than the size of pbp.
+    Falls back to scanning pbp_slim when an index is missing or stale.
+
+    Args:
+        player_id: Player gsis id
+        columns: Columns to return (all by default)
+        id_columns: Player id columns to match on
+        seasons: Only these seasons' plays (all by default). Other
+            seasons' files are not opened.
+        output: "pandas" for a DataFrame, or "arrow" for a pyarrow Table
+
+    Returns:
+        The player's plays in file order (season, posteam, week, game, play)
+    """
+    found = _player_index.lookup(player_id, id_columns, seasons)
+    if found is not None:
+        metadata, by_season = found
+        tables = []
+        try:
+            for season, by_group in by_season.items():
+                parquet = pq.ParquetFile(
+                    query_engine.DATA_DIR
+                    / query_engine.PBP_SLIM_FILE.format(season=season),
+                    metadata=metadata[season],
+                )
+                table = parquet.read_row_groups(list(by_group), columns=columns)
+                starts = np.cumsum(
+                    [0] + [metadata[season].row_group(g).num_rows for g in by_group]
+                )[:-1]
+                tables.append(
+                    table.take(
+                        np.concatenate(
+                            [
+                                start + rows
+                                for start, rows in zip(starts, by_group.values())
+                            ]
+                        )
+                    )
+                )
+            if not tables:
+                # No plays: an empty table with the file's columns
+                season = next(iter(metadata))
+                parquet = pq.ParquetFile(
+                    query_engine.DATA_DIR
+                    / query_engine.PBP_SLIM_FILE.format(season=season),
+                    metadata=metadata[season],
+                )
+                tables.append(parquet.read_row_groups([], columns=columns))
+        except (OSError, pa.ArrowException):
+            # A pbp_slim file was replaced since the lookup; scan instead
+            found = None
+        else:
+            table = pa.concat_tables(tables)
+            return table.to_pandas() if output == "pandas" else table
+
+    select = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+    where = " OR ".join(f'"{column}" = ?' for column in id_columns)
+    params = [player_id] * len(id_columns)
+    if seasons is not None:
+        in_seasons = f"season IN ({', '.join('?' for _ in seasons)})"
+        where = f"({where}) AND {in_seasons if seasons else 'FALSE'}"
+        params += list(seasons)
+    return query_engine.query_parquet(
+        f"""
+        SELECT {select} FROM pbp_slim WHERE {where}
+        ORDER BY season, posteam, week, game_id, play_id
+        """,
+        params,
+        output=output,
+    )
+
+
+def player_week_stats(player_id: str, seasons: list = None, cancel_key=None) -> tuple:
+    """
+    Everything the fantasy charts show for a player: the weekly sums from
+    the loader's player_weeks table, with the per-chart series derived from
+    them in one vectorized pass, and the yards of each rush from
+    player_plays().
+
+    Args:
+        player_id: Player gsis id
+        seasons: Only these seasons (all by default)
+        cancel_key: See query_engine.query_parquet()
+
+    Returns:
+        (weekly, rushes) DataFrames. weekly has one row per season and week
+        the player had a play, in order, with snaps, targets, rushes,
+        completions, incompletions, catch_pct (NaN without targets),
+        rush_yards, rec_yards and total_yards. rushes has the season, week
+        and yards_gained of each rush attempt, in week order.
+    """
+    where, params = "player_id = ?", [player_id]
+    if seasons is not None:
+        in_seasons = f"season IN ({', '.join('?' for _ in seasons)})"
+        where += f" AND {in_seasons if seasons else 'FALSE'}"
+        params += list(seasons)
+    sums = ", ".join(
+        f"SUM({column})::BIGINT AS {column}" for column in PLAYER_WEEK_SUMS
+    )
+    weekly = query_engine.query_parquet(
+        f"""
+        SELECT season, week, {sums}
+        FROM player_weeks
+        WHERE {where}
+        GROUP BY season, week
+        ORDER BY season, week
+        """,
+        params,
+        output="arrow",
+        cancel_key=cancel_key,
+    )
+    totals = {
+        name: np.asarray(weekly.column(name).to_numpy(), dtype=np.int64)
+        for name in ("season", "week", *PLAYER_WEEK_SUMS)
+    }
+    targets, completions = totals["targets"], totals["completions"]
+    totals["incompletions"] = targets - completions
+    totals["catch_pct"] = (
+        np.divide(
+            completions,
+            targets,
+            out=np.full(len(targets), np.nan),
+            where=targets > 0,
+        )
+        * 100
+    )
+    totals["total_yards"] = totals["rush_yards"] + totals["rec_yards"]
+    weekly = pd.DataFrame(
+        {
+            name: totals[name]
+            for name in (
+                "season",
+                "week",
+                "snaps",
+                "targets",
+                "rushes",
+                "completions",
+                "incompletions",
+                "catch_pct",
+                "rush_yards",
+                "rec_yards",
+                "total_yards",
+            )
+        }
+    )
+
+    plays = player_plays(
+        player_id,
+        columns=["season", "week", "yards_gained", "rush_attempt"],
+        seasons=seasons,
+        output="arrow",
+    )
+    season = plays["season"].to_numpy().astype(np.int64)
+    week = plays["week"].to_numpy().astype(np.int64)
+    order = np.flatnonzero(pc.fill_null(plays["rush_attempt"], 0).to_numpy() == 1)
+    order = order[np.lexsort((week[order], season[order]))]
+    rushes = pd.DataFrame(
+        {
+            "season": season[order],
+            "week": week[order],
+            "yards_gained": plays["yards_gained"].take(order).to_pandas(),
+        }
+    )
+    return weekly, rushes
+
+
+RosterOptions = namedtuple("RosterOptions", ["seasons", "teams", "players"])
+
+
+class RosterIndex:
+    """
+    The loader's roster dropdown options, held in memory.
+
+    Reloaded when the options or rosters file changes, and unusable (get()
+    returns None) when the options are missing or were built from a
+    different rosters file.
+    """
+
+    def __init__(self):
+        self._stamp = None
+        self._options = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        options_path = query_engine.DATA_DIR / ROSTER_OPTIONS_FILE
+        rosters_path = query_engine.DATA_DIR / query_engine.DATASETS["rosters"]
+        stamp = query_engine._file_stamps([str(options_path), str(rosters_path)])
+        with self._lock:
+            if stamp == self._stamp:
+                return self._options
+
+        options = None
+        if all(mtime is not None for _, mtime, _ in stamp):
+            table = pq.read_table(options_path)
+            # The loader records which rosters file the options describe
+            built_for = table.schema.metadata or {}
+            current = {
+                b"rosters_num_rows": str(
+                    pq.read_metadata(rosters_path).num_rows
+                ).encode(),
+                b"rosters_size_bytes": str(stamp[1][2]).encode(),
+            }
+            if all(built_for.get(key) == value for key, value in current.items()):
+                options = self._options_from(table)
+
+        with self._lock:
+            self._stamp, self._options = stamp, options
+        return options
+
+    @staticmethod
+    def _options_from(table: pa.Table) -> RosterOptions:
+        players = {}
+        for season, team, position, label, value in zip(
+            *(
+                table.column(name).to_pylist()
+                for name in ("season", "team", "position", "label", "value")
+            )
+        ):
+            players.setdefault((season, team, position), []).append(
+                {"label": label, "value": value}
+            )
+        seasons = set(table.column("season").to_pylist())
+        teams = set(table.column("team").to_pylist()) - {None}
+        return RosterOptions(
+            seasons=sorted(seasons, reverse=True),
+            teams=sorted(teams),
+            players=players,
+        )
+
+
+_roster_index = RosterIndex()
+
+
+def roster_options():
+    """
+    Season, team and player dropdown options from the loader's roster index.
+
+    Returns:
+        RosterOptions: seasons (newest first), teams (sorted), and players,
+        a dict of (season, team, position) -> [{"label", "value"}] in roster
+        order; or None if the index is missing or stale, in which case
+        query rosters instead
+    """
+    return _roster_index.get()
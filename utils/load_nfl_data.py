@@ -4,177 +4,1108 @@ Load NFL data using nflreadpy and save as Parquet files.
 Run this script once to download data:
     python utils/load_nfl_data.py
 
+Also write play-by-play as season/week partitions:
+    python utils/load_nfl_data.py --partition-pbp
+
+During the season, fetch only the current season and rewrite only the
+games that are new or changed since the last run:
+    python utils/load_nfl_data.py --incremental
+
+Refresh only some datasets (they load concurrently):
+    python utils/load_nfl_data.py --datasets teams rosters
+
 Then query the Parquet files in your Dash pages!
 """
 
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import nflreadpy as nfl
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 
 # Create data directory
 DATA_DIR = Path("data/parquet")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Seasons of play-by-play kept on disk; the last one is the season in progress
+SEASONS = [2022, 2023, 2024, 2025]
+
+# Hive-partitioned play-by-play: nfl_pbp/season=YYYY/week=WW/part-0.parquet
+PBP_PARTITION_DIR = "nfl_pbp"
+
+# How parquet files are written. Play-by-play is sorted so each row group
+# covers a narrow range of seasons and teams, and the min/max statistics
+# on those columns let DuckDB skip row groups a filter can't match. Row
+# groups are small enough that a team's season is a few of them rather
+# than a slice of one that spans the league.
+PARQUET_COMPRESSION = os.environ.get("NFL_PARQUET_COMPRESSION", "zstd")
+PARQUET_COMPRESSION_LEVEL = int(os.environ.get("NFL_PARQUET_COMPRESSION_LEVEL", "3"))
+PARQUET_ROW_GROUP_SIZE = int(os.environ.get("NFL_PARQUET_ROW_GROUP_SIZE", "16384"))
+PBP_SORT = ["season", "posteam", "week", "game_id", "play_id"]
+
+# Play-by-play is kept as one file per season, so an incremental update
+# rewrites only the seasons it downloaded and never reads the others
+PBP_RAW_FILE = "nfl_pbp_raw_{season}.parquet"
+
+# Projected play-by-play the pages read: the ~20 columns they use out of
+# 370+, with compact types. Flags fit in int8, ids and team codes are
+# dictionary-encoded. Columns missing from a season's download are null.
+PBP_SLIM_FILE = "nfl_pbp_slim_{season}.parquet"
+_CODE = pa.dictionary(pa.int32(), pa.string())
+PBP_SLIM_SCHEMA = pa.schema(
+    [
+        ("game_id", _CODE),
+        ("play_id", pa.int32()),
+        ("season", pa.int16()),
+        ("week", pa.int8()),
+        ("posteam", _CODE),
+        ("defteam", _CODE),
+        ("play_type", _CODE),
+        ("passer_id", _CODE),
+        ("rusher_id", _CODE),
+        ("receiver_id", _CODE),
+        ("yards_gained", pa.int16()),
+        ("pass_attempt", pa.int8()),
+        ("rush_attempt", pa.int8()),
+        ("complete_pass", pa.int8()),
+        ("first_down", pa.int8()),
+        ("interception", pa.int8()),
+        ("fumble_lost", pa.int8()),
+        ("touchdown", pa.int8()),
+        ("posteam_score", pa.int16()),
+        ("epa", pa.float32()),
+    ]
+)
+
+# Record of the games on disk (game_id -> season, week, plays, fingerprint),
+# which --incremental compares fresh downloads against
+MANIFEST_FILE = "nfl_load_manifest.json"
+
+# Index of a season's slim file's player ids: one row per (player_id,
+# id_column, row_group) listing the positions of that player's plays in the
+# row group, so looking a player up reads just those plays
+# (query_engine.player_plays)
+PBP_PLAYER_INDEX_FILE = "nfl_pbp_player_index_{season}.parquet"
+
+# Single-file play-by-play from before it was split by season
+LEGACY_PBP_FILES = [
+    "nfl_pbp_raw.parquet",
+    "nfl_pbp_slim.parquet",
+    "nfl_pbp_player_index.parquet",
+]
+
+# Fantasy page usage and yardage per player and week, over the plays naming
+# the player in any role (role -> the pbp column naming them)
+PLAYER_WEEKS_FILE = "nfl_player_weeks.parquet"
+PLAYER_ROLES = {"rusher": "rusher_id", "receiver": "receiver_id"}
+
+# Fantasy page player dropdown options: one row per distinct (season, team,
+# position, player) in roster order, so the page looks options up by key
+# instead of filtering rosters (query_engine.roster_options)
+ROSTER_OPTIONS_FILE = "nfl_roster_options.parquet"
+
+# Team game stats with precomputed season rollups (the Team Offense Trends
+# stat dropdown)
+ROLLUP_STATS = ["total_yards", "passing_yards", "rushing_yards", "points"]
 
-def load_play_by_play(seasons=[2022, 2023, 2024, 2025]):
-    """Load play-by-play data and save as Parquet"""
+
+def load_play_by_play(seasons=SEASONS, partitioned=False, load_pbp=None):
+    """
+    Load play-by-play data and save as Parquet, one season at a time.
+
+    Each season is written to its own raw and slim files (see
+    PBP_SLIM_SCHEMA) and the partitions, and aggregated into team game
+    stats before the next one is fetched, so peak memory is about one
+    season no matter how many are loaded.
+
+    Returns:
+        (team_games, games): team game stats for every season (also saved
+        to nfl_team_games.parquet) and game_fingerprints() of the plays
+    """
     print(f"Loading play-by-play data for seasons {seasons}...")
+    load_pbp = load_pbp or nfl.load_pbp
+
+    staging_dir = DATA_DIR / f"{PBP_PARTITION_DIR}.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    team_games = []
+    player_weeks = []
+    games = {}
+    for season in seasons:
+        pbp = load_pbp([season])
+        if not isinstance(pbp, pl.DataFrame):
+            pbp = pl.from_pandas(pbp)
+
+        write_pbp_season(pbp, season)
+        if partitioned:
+            _write_partition_files(pbp, staging_dir)
+
+        team_games.append(aggregate_team_games(pbp))
+        player_weeks.append(aggregate_player_weeks(pbp))
+        games.update(game_fingerprints(pbp))
+        del pbp
+
+    # Seasons no longer kept, and the single-file layout
+    for season in set(pbp_seasons()) - set(seasons):
+        _remove_pbp_season(season)
+    for name in LEGACY_PBP_FILES:
+        (DATA_DIR / name).unlink(missing_ok=True)
+
+    if partitioned:
+        _swap_partitions(staging_dir)
+
+    team_games = save_team_game_stats(
+        pl.concat(team_games, how="diagonal_relaxed").sort(
+            ["season", "week", "posteam"]
+        )
+    )
+    save_player_weeks(pl.concat(player_weeks, how="diagonal_relaxed"))
+    return team_games, games
+
+
+def pbp_file(pattern: str, season) -> Path:
+    """Path of one season's file for a per-season pattern (e.g. PBP_RAW_FILE)"""
+    return DATA_DIR / pattern.format(season=int(season))
+
+
+def pbp_seasons(pattern: str = PBP_RAW_FILE) -> list:
+    """Seasons with a file on disk for a per-season pattern, in order"""
+    prefix, suffix = pattern.split("{season}")
+    return sorted(
+        int(path.name[len(prefix) : -len(suffix)])
+        for path in DATA_DIR.glob(pattern.format(season="*"))
+        if path.name[len(prefix) : -len(suffix)].isdigit()
+    )
+
+
+def read_pbp_seasons(seasons=None):
+    """Yield (season, plays) from the raw files on disk, one season at a time"""
+    for season in pbp_seasons() if seasons is None else seasons:
+        yield season, pl.read_parquet(pbp_file(PBP_RAW_FILE, season))
+
+
+def _remove_pbp_season(season):
+    for pattern in (PBP_RAW_FILE, PBP_SLIM_FILE, PBP_PLAYER_INDEX_FILE):
+        pbp_file(pattern, season).unlink(missing_ok=True)
+
+
+def slim_pbp(table: pa.Table) -> pa.Table:
+    """Project raw play-by-play onto PBP_SLIM_SCHEMA."""
+    return _cast_to_schema(table, PBP_SLIM_SCHEMA)
+
+
+def write_pbp(pbp):
+    """Write the raw, slim and player index files of every season in pbp"""
+    for season in _seasons_in(pbp):
+        write_pbp_season(pbp.filter(pl.col("season") == season), season)
+
+
+def write_pbp_season(pbp, season):
+    """
+    Write one season's raw and slim play-by-play, sorted by PBP_SORT, and
+    the player index over the slim file, replacing any earlier copy. Other
+    seasons' files are left alone.
+
+    Each season keeps the columns and types of its own download; readers
+    combine the seasons by column name (see _report_schema_changes()).
+    """
+    table = pbp.sort(PBP_SORT, nulls_last=True).to_arrow()
+    _report_schema_changes(table.schema, season)
+    output_path = pbp_file(PBP_RAW_FILE, season)
+    _replace_file(output_path, lambda path: _write_table(table, path))
+    print(f"✓ Saved: {output_path} ({table.num_rows:,} plays)")
+    _write_slim_season(table, season)
+
+
+def _report_schema_changes(schema: pa.Schema, season):
+    """
+    Log how a season's columns differ from the closest earlier season on
+    disk. Nothing is dropped or cast: the pbp view reads the season files
+    with union_by_name, so a column a season lacks is null there and a
+    column whose type changed is read as the wider of the two types.
+    """
+    earlier = [s for s in pbp_seasons() if s < int(season)]
+    if not earlier:
+        return
+    previous = pq.read_schema(pbp_file(PBP_RAW_FILE, earlier[-1]))
+
+    added = [name for name in schema.names if name not in previous.names]
+    missing = [name for name in previous.names if name not in schema.names]
+    retyped = {
+        name: f"{previous.field(name).type} -> {schema.field(name).type}"
+        for name in schema.names
+        if name in previous.names
+        and not schema.field(name).type.equals(previous.field(name).type)
+    }
+    if added:
+        print(f"  ⚠️ {season}: new columns (null before {season}): {added}")
+    if missing:
+        print(f"  ⚠️ {season}: columns missing (null in {season}): {missing}")
+    if retyped:
+        print(f"  ⚠️ {season}: column types changed since {earlier[-1]}: {retyped}")
+
+
+def write_slim_pbp(pbp):
+    """Rewrite the slim play-by-play files of every season in pbp"""
+    for season in _seasons_in(pbp):
+        plays = pbp.filter(pl.col("season") == season)
+        _write_slim_season(plays.sort(PBP_SORT, nulls_last=True).to_arrow(), season)
+
+
+def _seasons_in(pbp) -> list:
+    return sorted(int(season) for season in pbp["season"].unique())
+
+
+def _write_slim_season(table: pa.Table, season):
+    output_path = pbp_file(PBP_SLIM_FILE, season)
+    _replace_file(output_path, lambda path: _write_table(slim_pbp(table), path))
+    print(f"✓ Saved: {output_path} ({len(PBP_SLIM_SCHEMA)} columns)")
+    write_player_index(season)
+
+
+def write_player_index(season):
+    """
+    Index the player id columns of a season's slim file (see
+    PBP_PLAYER_INDEX_FILE).
+
+    The slim file's row count and size go in the index's metadata, so
+    readers can tell when it is stale.
+    """
+    slim_path = pbp_file(PBP_SLIM_FILE, season)
+    parquet = pq.ParquetFile(slim_path)
+    id_columns = list(PLAYER_ROLES.values())
 
-    pbp = nfl.load_pbp(seasons)
+    entries = []
+    for row_group in range(parquet.num_row_groups):
+        ids = pl.from_arrow(parquet.read_row_group(row_group, columns=id_columns))
+        ids = ids.with_columns(pl.col(id_columns).cast(pl.Utf8)).with_row_index("row")
+        for column in id_columns:
+            entries.append(
+                ids.filter(pl.col(column).is_not_null()).select(
+                    pl.col(column).alias("player_id"),
+                    pl.lit(column).alias("id_column"),
+                    pl.lit(row_group, pl.Int32).alias("row_group"),
+                    pl.col("row").cast(pl.Int32),
+                )
+            )
 
-    # Save raw data (polars or pandas both work)
-    output_path = DATA_DIR / "nfl_pbp_raw.parquet"
-    if isinstance(pbp, pl.DataFrame):
-        pbp.write_parquet(output_path)
+    schema = {
+        "player_id": pl.Utf8,
+        "id_column": pl.Utf8,
+        "row_group": pl.Int32,
+        "row": pl.Int32,
+    }
+    index = (
+        pl.concat([pl.DataFrame(schema=schema), *entries])
+        .group_by(["player_id", "id_column", "row_group"])
+        .agg(pl.col("row").sort().alias("rows"))
+        .sort(["player_id", "id_column", "row_group"])
+        .with_columns(pl.col("player_id", "id_column").cast(pl.Categorical))
+        .to_arrow()
+    )
+    index = index.replace_schema_metadata(
+        {
+            "pbp_num_rows": str(parquet.metadata.num_rows),
+            "pbp_size_bytes": str(slim_path.stat().st_size),
+        }
+    )
+
+    output_path = pbp_file(PBP_PLAYER_INDEX_FILE, season)
+    _replace_file(output_path, lambda path: pq.write_table(index, path))
+    print(f"✓ Saved: {output_path} ({len(index):,} player row groups)")
+
+
+def write_parquet(frame, path, sort_by=None):
+    """
+    Write a polars frame with the PARQUET_* settings, sorted by sort_by
+    (nulls last) if given.
+    """
+    if sort_by:
+        frame = frame.sort(sort_by, nulls_last=True)
+    frame.write_parquet(
+        path,
+        compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_COMPRESSION_LEVEL,
+        statistics=True,
+        row_group_size=PARQUET_ROW_GROUP_SIZE,
+    )
+
+
+def _write_table(table: pa.Table, path):
+    """Write an Arrow table with the PARQUET_* settings."""
+    with _parquet_writer(path, table.schema) as writer:
+        writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
+
+
+def _parquet_writer(path, schema: pa.Schema) -> pq.ParquetWriter:
+    """Streaming parquet writer with the PARQUET_* settings."""
+    # Row group size is per write_table() call (PARQUET_ROW_GROUP_SIZE)
+    # Dictionary pages only for ids and codes: on continuous columns like
+    # epa they grow the file instead of shrinking it
+    dictionary_columns = [
+        field.name
+        for field in schema
+        if pa.types.is_dictionary(field.type)
+        or pa.types.is_string(field.type)
+        or pa.types.is_large_string(field.type)
+    ]
+    return pq.ParquetWriter(
+        path,
+        schema,
+        compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_COMPRESSION_LEVEL,
+        use_dictionary=dictionary_columns,
+        write_statistics=True,
+    )
+
+
+def _cast_to_schema(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    columns = []
+    for field in schema:
+        column = pa.nulls(table.num_rows, field.type)
+        if field.name in table.column_names:
+            try:
+                column = table.column(field.name).cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                print(
+                    f"  ⚠️ {field.name}: can't read"
+                    f" {table.schema.field(field.name).type} as {field.type},"
+                    " leaving it null"
+                )
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def write_pbp_partitions(pbp, weeks=None):
+    """
+    Save play-by-play as one file per season and week, so queries that
+    filter on season/week only read the matching files.
+
+    Args:
+        pbp: Play-by-play to write; with weeks, at least every play of
+            those weeks
+        weeks: (season, week) pairs to rewrite, leaving the other
+            partitions alone (default: rewrite everything)
+    """
+    if not isinstance(pbp, pl.DataFrame):
+        pbp = pl.from_pandas(pbp)
+
+    output_dir = DATA_DIR / PBP_PARTITION_DIR
+    staging_dir = DATA_DIR / f"{PBP_PARTITION_DIR}.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    if weeks is not None and output_dir.exists():
+        weeks = {(int(season), int(week)) for season, week in weeks}
+        pbp = pbp.filter(
+            pl.struct(["season", "week"]).is_in(
+                [{"season": season, "week": week} for season, week in weeks]
+            )
+        )
     else:
-        pbp.to_parquet(output_path, index=False)
-    print(f"✓ Saved: {output_path} ({len(pbp):,} plays)")
+        weeks = None
+
+    staged = _write_partition_files(pbp, staging_dir)
+
+    if weeks is None:
+        _swap_partitions(staging_dir)
+        return
+
+    # Swap week by week; weeks left without plays are removed
+    for season, week in sorted(weeks):
+        relative = Path(f"season={season}") / f"week={week:02d}"
+        shutil.rmtree(output_dir / relative, ignore_errors=True)
+        if (season, week) in staged:
+            (output_dir / relative).parent.mkdir(exist_ok=True)
+            (staging_dir / relative).rename(output_dir / relative)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    _report_partitions()
+
+
+def _write_partition_files(pbp, staging_dir) -> set:
+    """Write pbp's season/week partitions under staging_dir."""
+    staged = set()
+    for (season, week), plays in pbp.group_by(["season", "week"]):
+        partition = staging_dir / f"season={int(season)}" / f"week={int(week):02d}"
+        partition.mkdir(parents=True)
+        # season/week live in the directory names, not the files
+        write_parquet(
+            plays.sort(PBP_SORT, nulls_last=True).drop(["season", "week"]),
+            partition / "part-0.parquet",
+        )
+        staged.add((int(season), int(week)))
+    return staged
+
 
-    return pbp
+def _swap_partitions(staging_dir):
+    # Swap in the new layout so readers never see a half-written directory
+    output_dir = DATA_DIR / PBP_PARTITION_DIR
+    shutil.rmtree(output_dir, ignore_errors=True)
+    staging_dir.mkdir(exist_ok=True)
+    staging_dir.rename(output_dir)
+    _report_partitions()
+
+
+def _report_partitions():
+    output_dir = DATA_DIR / PBP_PARTITION_DIR
+    n_files = len(list(output_dir.glob("season=*/week=*/*.parquet")))
+    print(f"✓ Saved: {output_dir}/ ({n_files} season/week partitions)")
 
 
 def create_team_game_stats(pbp):
     """Aggregate play-by-play into team game stats"""
     print("Creating team game stats...")
 
-    # Convert to pandas for groupby operations (easier syntax)
-    if isinstance(pbp, pl.DataFrame):
-        pbp = pbp.to_pandas()
+    return save_team_game_stats(aggregate_team_games(pbp))
 
-    team_games = (
-        pbp.groupby(["game_id", "season", "week", "posteam"])
+
+def save_team_game_stats(team_games):
+    """Write team game stats to nfl_team_games.parquet"""
+    output_path = DATA_DIR / "nfl_team_games.parquet"
+    _replace_file(output_path, lambda path: write_parquet(team_games, path))
+    print(f"✓ Saved: {output_path} ({len(team_games):,} games)")
+
+    return team_games
+
+
+def aggregate_team_games(pbp):
+    """
+    One row per (game, offense) with yardage, scoring and turnover totals.
+
+    A single lazy group-by: passing and rushing yards are conditional sums
+    in the same pass rather than separate filtered aggregations joined back.
+    """
+    if not isinstance(pbp, pl.DataFrame):
+        pbp = pl.from_pandas(pbp)
+
+    keys = ["game_id", "season", "week", "posteam"]
+    yards = pl.col("yards_gained")
+
+    return (
+        pbp.lazy()
+        # Plays without an offense (e.g. timeouts) don't belong to a team game
+        .filter(pl.all_horizontal(pl.col(keys).is_not_null()))
+        .group_by(keys)
         .agg(
-            {
-                "yards_gained": "sum",
-                "pass_attempt": "sum",
-                "rush_attempt": "sum",
-                "first_down": "sum",
-                "interception": "sum",
-                "fumble_lost": "sum",
-                "touchdown": "sum",
-                "posteam_score": "max",
-            }
+            yards.sum().alias("total_yards"),
+            pl.col("pass_attempt").sum().alias("pass_attempts"),
+            pl.col("rush_attempt").sum().alias("rush_attempts"),
+            pl.col("first_down").sum().alias("first_downs"),
+            pl.col("interception").sum(),
+            pl.col("fumble_lost").sum(),
+            pl.col("touchdown").sum(),
+            pl.col("posteam_score").max().alias("points"),
+            yards.filter(pl.col("pass_attempt") == 1).sum().alias("passing_yards"),
+            yards.filter(pl.col("rush_attempt") == 1).sum().alias("rushing_yards"),
+        )
+        .with_columns(
+            (pl.col("interception") + pl.col("fumble_lost")).alias("turnovers")
         )
-        .reset_index()
+        .sort(["season", "week", "posteam"])
+        .collect()
     )
 
-    # Rename columns for clarity
-    team_games = team_games.rename(
-        columns={
-            "yards_gained": "total_yards",
-            "pass_attempt": "pass_attempts",
-            "rush_attempt": "rush_attempts",
-            "first_down": "first_downs",
-            "posteam_score": "points",
-        }
+
+def update_team_game_stats(pbp, game_ids):
+    """
+    Recompute team game stats for game_ids only and merge them into
+    nfl_team_games.parquet.
+
+    Args:
+        pbp: Plays of the new or changed games
+        game_ids: Every affected game, including ones that were removed
+    """
+    print(f"Updating team game stats for {len(game_ids)} games...")
+
+    output_path = DATA_DIR / "nfl_team_games.parquet"
+    existing = pl.read_parquet(output_path)
+    updated = aggregate_team_games(pbp)
+
+    team_games = pl.concat(
+        [existing.filter(~pl.col("game_id").is_in(list(game_ids))), updated],
+        how="diagonal_relaxed",
+    ).sort(["season", "week", "posteam"])
+    _replace_file(output_path, lambda path: write_parquet(team_games, path))
+    print(f"✓ Saved: {output_path} ({len(updated):,} team games updated)")
+
+    return team_games
+
+
+def aggregate_player_weeks(pbp):
+    """
+    One row per (season, week, player_id) with the player's plays
+    ("snaps"), targets, rushes, completions, and rushing/receiving yards.
+
+    A player's plays are those naming them in any PLAYER_ROLES column; a
+    play naming them in two (e.g. a completed pass they also ran with)
+    counts once.
+    """
+    if not isinstance(pbp, pl.DataFrame):
+        pbp = pl.from_pandas(pbp)
+
+    keys = ["season", "week", "player_id"]
+    yards = pl.col("yards_gained")
+    plays = pbp.lazy().select(
+        "game_id",
+        "play_id",
+        "season",
+        "week",
+        "posteam",
+        "pass_attempt",
+        "rush_attempt",
+        "complete_pass",
+        "yards_gained",
+        *PLAYER_ROLES.values(),
     )
 
-    # Calculate passing and rushing yards separately
-    passing = (
-        pbp[pbp["pass_attempt"] == 1]
-        .groupby(["game_id", "posteam"])["yards_gained"]
-        .sum()
-        .reset_index()
+    return (
+        pl.concat(
+            [
+                plays.filter(pl.col(column).is_not_null()).select(
+                    pl.exclude(list(PLAYER_ROLES.values())),
+                    pl.col(column).alias("player_id"),
+                )
+                for column in PLAYER_ROLES.values()
+            ]
+        )
+        .unique(["game_id", "play_id", "player_id"])
+        .group_by(keys)
+        .agg(
+            pl.col("game_id").first(),
+            pl.col("posteam").first(),
+            pl.len().alias("snaps"),
+            pl.col("pass_attempt").sum().alias("targets"),
+            pl.col("rush_attempt").sum().alias("rushes"),
+            pl.col("complete_pass").sum().alias("completions"),
+            yards.filter(pl.col("rush_attempt") == 1).sum().alias("rush_yards"),
+            yards.filter(pl.col("complete_pass") == 1).sum().alias("rec_yards"),
+        )
+        .sort(keys)
+        .collect()
     )
-    passing = passing.rename(columns={"yards_gained": "passing_yards"})
 
-    rushing = (
-        pbp[pbp["rush_attempt"] == 1]
-        .groupby(["game_id", "posteam"])["yards_gained"]
-        .sum()
-        .reset_index()
+
+def save_player_weeks(player_weeks):
+    """Write player week stats to PLAYER_WEEKS_FILE"""
+    output_path = DATA_DIR / PLAYER_WEEKS_FILE
+    # Player first, so lookups of one player skip the other row groups
+    _replace_file(
+        output_path,
+        lambda path: write_parquet(
+            player_weeks, path, sort_by=["player_id", "season", "week"]
+        ),
     )
-    rushing = rushing.rename(columns={"yards_gained": "rushing_yards"})
+    print(f"✓ Saved: {output_path} ({len(player_weeks):,} player weeks)")
 
-    # Merge
-    team_games = team_games.merge(passing, on=["game_id", "posteam"], how="left")
-    team_games = team_games.merge(rushing, on=["game_id", "posteam"], how="left")
+    return player_weeks
 
-    # Fill NaN with 0
-    team_games["passing_yards"] = team_games["passing_yards"].fillna(0)
-    team_games["rushing_yards"] = team_games["rushing_yards"].fillna(0)
 
-    # Calculate turnovers
-    team_games["turnovers"] = team_games["interception"] + team_games["fumble_lost"]
+def _player_weeks_current():
+    """
+    Whether PLAYER_WEEKS_FILE exists in the current layout. Files from
+    before player weeks counted each play once have a row per role and
+    are rebuilt rather than updated.
+    """
+    path = DATA_DIR / PLAYER_WEEKS_FILE
+    return path.exists() and "role" not in pq.read_schema(path).names
 
-    # Sort
-    team_games = team_games.sort_values(["season", "week", "posteam"])
 
-    output_path = DATA_DIR / "nfl_team_games.parquet"
-    team_games.to_parquet(output_path, index=False)
-    print(f"✓ Saved: {output_path} ({len(team_games):,} games)")
+def update_player_weeks(pbp, game_ids):
+    """
+    Recompute player week stats for game_ids only and merge them into
+    PLAYER_WEEKS_FILE.
 
-    return team_games
+    Args:
+        pbp: Plays of the new or changed games
+        game_ids: Every affected game, including ones that were removed
+    """
+    print(f"Updating player week stats for {len(game_ids)} games...")
+
+    existing = pl.read_parquet(DATA_DIR / PLAYER_WEEKS_FILE)
+    player_weeks = pl.concat(
+        [
+            existing.filter(~pl.col("game_id").is_in(list(game_ids))),
+            aggregate_player_weeks(pbp),
+        ],
+        how="diagonal_relaxed",
+    ).sort(["season", "week", "player_id"])
+    return save_player_weeks(player_weeks)
+
+
+def create_team_season_rollups(team_games):
+    """
+    Precompute season summaries and week-by-week running values per team.
+
+    Writes nfl_team_season_stats.parquet, one row per (season, posteam) with
+    total/mean/max/min of each stat in ROLLUP_STATS plus games and
+    turnovers, and nfl_team_week_running.parquet, one row per team game with
+    the season-to-date total and average of each stat.
+    """
+    print("Creating team season rollups...")
+
+    if not isinstance(team_games, pl.DataFrame):
+        team_games = pl.from_pandas(team_games)
+
+    keys = ["season", "posteam"]
+    team_games = team_games.filter(pl.col("posteam").is_not_null())
+
+    season_stats = (
+        team_games.group_by(keys)
+        .agg(
+            pl.len().alias("games"),
+            pl.col("turnovers").sum().alias("total_turnovers"),
+            *[
+                agg
+                for stat in ROLLUP_STATS
+                for agg in (
+                    pl.col(stat).sum().alias(f"{stat}_total"),
+                    pl.col(stat).mean().alias(f"{stat}_mean"),
+                    pl.col(stat).max().alias(f"{stat}_max"),
+                    pl.col(stat).min().alias(f"{stat}_min"),
+                )
+            ],
+        )
+        .sort(keys)
+    )
+
+    games_so_far = pl.int_range(1, pl.len() + 1).over(keys)
+    week_running = team_games.sort([*keys, "week"]).select(
+        *keys,
+        "week",
+        games_so_far.alias("games_played"),
+        *[
+            col
+            for stat in ROLLUP_STATS
+            for col in (
+                pl.col(stat).cum_sum().over(keys).alias(f"{stat}_to_date"),
+                (pl.col(stat).cum_sum().over(keys) / games_so_far).alias(
+                    f"{stat}_avg_to_date"
+                ),
+            )
+        ],
+    )
+
+    output_path = DATA_DIR / "nfl_team_season_stats.parquet"
+    _replace_file(output_path, lambda path: write_parquet(season_stats, path))
+    print(f"✓ Saved: {output_path} ({season_stats.height:,} team seasons)")
+
+    output_path = DATA_DIR / "nfl_team_week_running.parquet"
+    _replace_file(output_path, lambda path: write_parquet(week_running, path))
+    print(f"✓ Saved: {output_path} ({week_running.height:,} team weeks)")
+
+    return season_stats, week_running
+
+
+def game_fingerprints(pbp) -> dict:
+    """
+    Summarize play-by-play per game for change detection.
+
+    Returns:
+        Dictionary of game_id -> {"season", "week", "plays", "fingerprint"},
+        where fingerprint is an order-independent hash of the game's rows
+    """
+    if not isinstance(pbp, pl.DataFrame):
+        pbp = pl.from_pandas(pbp)
+
+    games = (
+        pbp.with_columns(pbp.hash_rows(seed=0).alias("_row_hash"))
+        .group_by("game_id")
+        .agg(
+            pl.col("season").first(),
+            pl.col("week").first(),
+            pl.len().alias("plays"),
+            # Wrapping sum: the same plays give the same value in any order
+            pl.col("_row_hash").sum().alias("fingerprint"),
+        )
+    )
+    return {row.pop("game_id"): row for row in games.iter_rows(named=True)}
+
+
+def read_manifest() -> dict:
+    """Games recorded by the last load (empty if there is no manifest)."""
+    try:
+        with open(DATA_DIR / MANIFEST_FILE) as f:
+            return json.load(f)["games"]
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(games: dict):
+    """Record the games now on disk."""
+    _replace_file(
+        DATA_DIR / MANIFEST_FILE,
+        lambda path: Path(path).write_text(json.dumps({"games": games})),
+    )
+
+
+def _replace_file(output_path, write):
+    """Write through a temporary file so readers never see a partial file."""
+    tmp_path = Path(f"{output_path}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, output_path)
+
+
+def update_play_by_play(seasons=SEASONS, partitioned=None, load_pbp=None):
+    """
+    Bring play-by-play and the tables derived from it up to date, fetching
+    and rewriting as little as possible.
+
+    Only seasons missing from disk plus the last (in-progress) season are
+    downloaded. Games whose plays are new, changed or gone are found by
+    comparing fingerprints with the manifest; only their seasons' files,
+    season/week partitions and team game rows are rewritten, and the other
+    seasons are never read. Falls back to a full load when there is no
+    play-by-play on disk yet.
+
+    Args:
+        seasons: Seasons to keep on disk
+        partitioned: Update the season/week partitions (default: only if
+            they already exist)
+        load_pbp: Function taking a list of seasons and returning their
+            play-by-play (default nfl.load_pbp)
+
+    Returns:
+        Set of affected game ids
+    """
+    if partitioned is None:
+        partitioned = (DATA_DIR / PBP_PARTITION_DIR).exists()
+
+    if not pbp_seasons() and (DATA_DIR / LEGACY_PBP_FILES[0]).exists():
+        _split_legacy_pbp()
+
+    if not pbp_seasons():
+        print("No play-by-play on disk yet, loading everything...")
+        team_games, games = load_play_by_play(
+            seasons, partitioned=partitioned, load_pbp=load_pbp
+        )
+        create_team_season_rollups(team_games)
+        write_manifest(games)
+        return set(games)
+
+    manifest = read_manifest()
+    if not manifest:
+        # A load from before manifests existed: fingerprint what is on disk
+        for _, plays in read_pbp_seasons():
+            manifest.update(game_fingerprints(plays))
+
+    seasons_on_disk = {game["season"] for game in manifest.values()}
+    fetch = sorted({s for s in seasons if s not in seasons_on_disk} | {max(seasons)})
+    print(f"Checking play-by-play for seasons {fetch}...")
+
+    fresh = (load_pbp or nfl.load_pbp)(fetch)
+    if not isinstance(fresh, pl.DataFrame):
+        fresh = pl.from_pandas(fresh)
+    fresh_games = game_fingerprints(fresh)
+
+    changed = {
+        game_id
+        for game_id, game in fresh_games.items()
+        if manifest.get(game_id) != game
+    }
+    removed = {
+        game_id
+        for game_id, game in manifest.items()
+        if game["season"] in fetch and game_id not in fresh_games
+    }
+    affected = changed | removed
+    if not affected:
+        print("✓ Play-by-play is up to date")
+        _backfill_pbp(partitioned)
+        return affected
+
+    print(f"  {len(changed)} new or changed games, {len(removed)} removed")
+    affected_games = [
+        game
+        for game_id in affected
+        for game in (manifest.get(game_id), fresh_games.get(game_id))
+        if game is not None
+    ]
+
+    # Fetched seasons come down whole, so each affected one is written
+    # straight from the download
+    for season in sorted({game["season"] for game in affected_games}):
+        plays = fresh.filter(pl.col("season") == season)
+        if plays.is_empty():
+            _remove_pbp_season(season)
+        else:
+            write_pbp_season(plays, season)
+
+    if partitioned:
+        if (DATA_DIR / PBP_PARTITION_DIR).exists():
+            weeks = {(game["season"], game["week"]) for game in affected_games}
+            write_pbp_partitions(fresh, weeks=weeks)
+        else:
+            rebuild_pbp_partitions()
+
+    changed_plays = fresh.filter(pl.col("game_id").is_in(list(changed)))
+    if (DATA_DIR / "nfl_team_games.parquet").exists():
+        team_games = update_team_game_stats(changed_plays, affected)
+    else:
+        team_games = rebuild_team_game_stats()
+    if _player_weeks_current():
+        update_player_weeks(changed_plays, affected)
+    else:
+        rebuild_player_weeks()
+    create_team_season_rollups(team_games)
+
+    games = {
+        game_id: game for game_id, game in manifest.items() if game_id not in affected
+    }
+    games.update((game_id, fresh_games[game_id]) for game_id in changed)
+    write_manifest(games)
+
+    return affected
+
+
+def _backfill_pbp(partitioned):
+    """Write files derived from play-by-play that are missing from disk."""
+    for season in pbp_seasons():
+        if not pbp_file(PBP_SLIM_FILE, season).exists():
+            write_slim_pbp(pl.read_parquet(pbp_file(PBP_RAW_FILE, season)))
+        elif not pbp_file(PBP_PLAYER_INDEX_FILE, season).exists():
+            write_player_index(season)
+
+    if partitioned and not (DATA_DIR / PBP_PARTITION_DIR).exists():
+        rebuild_pbp_partitions()
+    if not _player_weeks_current():
+        rebuild_player_weeks()
+
+    team_games_path = DATA_DIR / "nfl_team_games.parquet"
+    rollups = ["nfl_team_season_stats.parquet", "nfl_team_week_running.parquet"]
+    if not team_games_path.exists():
+        create_team_season_rollups(rebuild_team_game_stats())
+    elif not all((DATA_DIR / name).exists() for name in rollups):
+        create_team_season_rollups(pl.read_parquet(team_games_path))
+
+
+def rebuild_pbp_partitions():
+    """Rewrite every season/week partition from the raw files on disk"""
+    staging_dir = DATA_DIR / f"{PBP_PARTITION_DIR}.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    for _, plays in read_pbp_seasons():
+        _write_partition_files(plays, staging_dir)
+    _swap_partitions(staging_dir)
+
+
+def rebuild_team_game_stats():
+    """Recompute nfl_team_games.parquet from the raw files on disk"""
+    print("Creating team game stats...")
+    team_games = [aggregate_team_games(plays) for _, plays in read_pbp_seasons()]
+    return save_team_game_stats(
+        pl.concat(team_games, how="diagonal_relaxed").sort(
+            ["season", "week", "posteam"]
+        )
+    )
 
 
-def load_team_info():
+def rebuild_player_weeks():
+    """Recompute PLAYER_WEEKS_FILE from the raw files on disk"""
+    player_weeks = [aggregate_player_weeks(plays) for _, plays in read_pbp_seasons()]
+    return save_player_weeks(pl.concat(player_weeks, how="diagonal_relaxed"))
+
+
+def _split_legacy_pbp():
+    """Split single-file play-by-play into per-season files."""
+    print("Splitting play-by-play into per-season files...")
+    raw = pl.scan_parquet(DATA_DIR / LEGACY_PBP_FILES[0])
+    for (season,) in raw.select("season").unique().collect().iter_rows():
+        write_pbp_season(raw.filter(pl.col("season") == season).collect(), season)
+    for name in LEGACY_PBP_FILES:
+        (DATA_DIR / name).unlink(missing_ok=True)
+
+
+def load_team_info(load_teams=None):
     """Load team reference data"""
     print("Loading team info...")
 
-    teams = nfl.load_teams()
+    teams = (load_teams or nfl.load_teams)()
 
     # Save (polars or pandas both work)
     output_path = DATA_DIR / "nfl_teams.parquet"
-    if isinstance(teams, pl.DataFrame):
-        teams.write_parquet(output_path)
-    else:
-        teams.to_parquet(output_path, index=False)
+    frame = teams if isinstance(teams, pl.DataFrame) else pl.from_pandas(teams)
+    _replace_file(output_path, lambda path: write_parquet(frame, path))
     print(f"✓ Saved: {output_path} ({len(teams)} teams)")
 
     return teams
 
 
-def load_rosters(seasons=[2025]):
+def load_rosters(seasons=[2025], load=None):
     """Load player rosters"""
     print(f"Loading rosters for {seasons}...")
 
-    rosters = nfl.load_rosters(seasons)
+    rosters = (load or nfl.load_rosters)(seasons)
 
     # Save (polars or pandas both work)
     output_path = DATA_DIR / "nfl_rosters.parquet"
-    if isinstance(rosters, pl.DataFrame):
-        rosters.write_parquet(output_path)
-    else:
-        rosters.to_parquet(output_path, index=False)
+    frame = rosters if isinstance(rosters, pl.DataFrame) else pl.from_pandas(rosters)
+    _replace_file(output_path, lambda path: write_parquet(frame, path))
     print(f"✓ Saved: {output_path} ({len(rosters):,} players)")
+    write_roster_options()
 
     return rosters
 
 
-def main():
+def write_roster_options():
+    """
+    Write the player dropdown options (see ROSTER_OPTIONS_FILE) for the
+    rosters on disk.
+
+    The rosters file's row count and size go in the options' metadata, so
+    readers can tell when they are stale.
+    """
+    rosters_path = DATA_DIR / "nfl_rosters.parquet"
+    rosters = pl.read_parquet(rosters_path)
+    name_col = "full_name" if "full_name" in rosters.columns else "football_name"
+
+    options = (
+        rosters.select(
+            "season",
+            "team",
+            "position",
+            pl.col(name_col).alias("label"),
+            pl.col("gsis_id").alias("value"),
+        )
+        .unique(maintain_order=True)
+        .to_arrow()
+    )
+    options = options.replace_schema_metadata(
+        {
+            "rosters_num_rows": str(len(rosters)),
+            "rosters_size_bytes": str(rosters_path.stat().st_size),
+        }
+    )
+
+    output_path = DATA_DIR / ROSTER_OPTIONS_FILE
+    _replace_file(output_path, lambda path: pq.write_table(options, path))
+    print(f"✓ Saved: {output_path} ({len(options):,} options)")
+
+
+def refresh_play_by_play(incremental=False, partitioned=False):
+    """Play-by-play and everything derived from it (team stats, manifest)"""
+    if incremental:
+        # Changed games only
+        update_play_by_play(seasons=SEASONS, partitioned=partitioned or None)
+    else:
+        # Season by season, aggregating as it goes
+        team_games, games = load_play_by_play(seasons=SEASONS, partitioned=partitioned)
+        create_team_season_rollups(team_games)
+        write_manifest(games)
+
+
+# Independent datasets main() can refresh, each with the files it writes
+DATASETS = {
+    "pbp": [
+        f"{PBP_RAW_FILE} (play-by-play, one file per season)",
+        f"{PBP_SLIM_FILE} (play-by-play, columns the pages use)",
+        f"{PBP_PLAYER_INDEX_FILE} (player id index over the slim play-by-play)",
+        "nfl_team_games.parquet (team game stats)",
+        "nfl_team_season_stats.parquet (team season rollups)",
+        "nfl_team_week_running.parquet (team season-to-date by week)",
+        f"{PLAYER_WEEKS_FILE} (player usage and yards by week)",
+    ],
+    "teams": ["nfl_teams.parquet (team info)"],
+    "rosters": [
+        "nfl_rosters.parquet (player rosters)",
+        f"{ROSTER_OPTIONS_FILE} (player dropdown options by season, team, position)",
+    ],
+}
+
+
+def load_datasets(loaders) -> dict:
+    """
+    Run dataset loaders concurrently on a thread pool.
+
+    They are independent downloads and writes, so one failing doesn't stop
+    the others.
+
+    Args:
+        loaders: Dataset name -> zero-argument function that loads it
+
+    Returns:
+        Dataset name -> (seconds taken, exception or None)
+    """
+
+    def timed(load):
+        start = time.perf_counter()
+        try:
+            load()
+            error = None
+        except Exception as e:
+            error = e
+        return time.perf_counter() - start, error
+
+    with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+        futures = {name: executor.submit(timed, load) for name, load in loaders.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def main(argv=None):
     """Load all NFL data"""
+    parser = argparse.ArgumentParser(description="Load NFL data into data/parquet")
+    parser.add_argument(
+        "--partition-pbp",
+        action="store_true",
+        help=f"also write play-by-play to {PBP_PARTITION_DIR}/season=YYYY/week=WW/",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only fetch the current season and rewrite new or changed games",
+    )
+    parser.add_argument(
+        "--datasets",
+        nargs="+",
+        choices=list(DATASETS),
+        default=list(DATASETS),
+        help="datasets to refresh (default: all)",
+    )
+    args = parser.parse_args(argv)
+
     print("=" * 60)
     print("NFL Data Loader (nflreadpy)")
     print("=" * 60)
 
-    try:
-        # Load play-by-play
-        pbp = load_play_by_play(seasons=[2022, 2023, 2024, 2025])
-
-        # Create aggregated stats
-        team_games = create_team_game_stats(pbp)
+    loaders = {
+        "pbp": lambda: refresh_play_by_play(args.incremental, args.partition_pbp),
+        "teams": load_team_info,
+        # Every season with plays, so any charted season has its players
+        "rosters": lambda: load_rosters(seasons=SEASONS),
+    }
+    results = load_datasets({name: loaders[name] for name in args.datasets})
+    failed = {name: error for name, (_, error) in results.items() if error}
 
-        # Load team info
-        teams = load_team_info()
-
-        # Load rosters
-        rosters = load_rosters(seasons=[2025])
-
-        print("\n" + "=" * 60)
+    print("\n" + "=" * 60)
+    for name, (seconds, error) in results.items():
+        status = f"❌ {error}" if error else "✓"
+        print(f"  {name:<8} {seconds:7.1f}s  {status}")
+    if failed:
+        print(f"❌ Failed to load: {', '.join(failed)}")
+    else:
         print("✅ All data loaded successfully!")
-        print("=" * 60)
-        print("\nFiles created in data/parquet/:")
-        print("  - nfl_pbp_raw.parquet (play-by-play)")
-        print("  - nfl_team_games.parquet (team game stats)")
-        print("  - nfl_teams.parquet (team info)")
-        print("  - nfl_rosters.parquet (player rosters)")
-        print("\nYou can now run your Dash app and query this data!")
-
-    except Exception as e:
-        print(f"\n❌ Error loading data: {e}")
+    print("=" * 60)
+
+    loaded = [name for name in results if name not in failed]
+    if loaded:
+        print("\nFiles written in data/parquet/:")
+        for name in loaded:
+            for description in DATASETS[name]:
+                print(f"  - {description}")
+            if name == "pbp" and args.partition_pbp:
+                print(f"  - {PBP_PARTITION_DIR}/ (play-by-play by season/week)")
+    if failed:
         print("\nMake sure you have nflreadpy installed:")
         print("  pip install nflreadpy")
+        return 1
+
+    print("\nYou can now run your Dash app and query this data!")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
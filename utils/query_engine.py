@@ -3,26 +3,1468 @@ Query engine for Parquet files using DuckDB.
 
 This module provides simple functions to query your analytics data
 without loading entire files into memory.
+
+All queries share one process-wide DuckDB database and borrow a cursor
+from a small pool, so parquet metadata and the buffer pool stay warm
+between callbacks. Known-heavy queries can opt into a second database
+with its own memory and thread limits (see RESOURCE_CLASSES).
 """
 
+import copy
+import datetime
+import glob
+import json
+import logging
+import math
+import numbers
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
 import duckdb
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 
 # Data directory - adjust this path as needed
 DATA_DIR = Path(__file__).parent.parent / "data" / "parquet"
 
+# Play-by-play the loader writes as one file per season
+PBP_RAW_FILE = "nfl_pbp_raw_{season}.parquet"
+PBP_SLIM_FILE = "nfl_pbp_slim_{season}.parquet"
+
+# Datasets registered as DuckDB views (view name -> file or glob in DATA_DIR)
+DATASETS = {
+    "team_games": "nfl_team_games.parquet",
+    "team_seasons": "nfl_team_season_stats.parquet",
+    "team_weeks_running": "nfl_team_week_running.parquet",
+    "player_weeks": "nfl_player_weeks.parquet",
+    "pbp": PBP_RAW_FILE.format(season="*"),
+    "pbp_slim": PBP_SLIM_FILE.format(season="*"),
+    "rosters": "nfl_rosters.parquet",
+    "teams": "nfl_teams.parquet",
+}
+
+# Small, hot datasets copied into in-memory tables when a process creates
+# its default pool (on its first query), in priority order, as long as their
+# uncompressed size fits MATERIALIZE_BUDGET_MB.
+# Everything else stays a view that scans the parquet file lazily.
+MATERIALIZE = [
+    name
+    for name in os.environ.get(
+        "QUERY_MATERIALIZE",
+        "teams,team_seasons,rosters,team_games,team_weeks_running,player_weeks",
+    ).split(",")
+    if name
+]
+MATERIALIZE_BUDGET_MB = float(os.environ.get("QUERY_MATERIALIZE_BUDGET_MB", "256"))
+
+# Datasets the loader can also write as hive partitions (view name ->
+# directory in DATA_DIR); the view reads the partitions when they exist so
+# season/week filters only open the matching files
+PARTITIONED_DATASETS = {"pbp": "nfl_pbp"}
+HIVE_TYPES = "{'season': INTEGER, 'week': INTEGER}"
+
+# Number of cursors available for concurrent queries (one per busy callback)
+POOL_SIZE = int(os.environ.get("DUCKDB_POOL_SIZE", "4"))
+
+# DuckDB resource limits. Both are database-wide, so every cursor in a pool
+# shares them; with several app workers on one box, split the machine
+# between them (e.g. 4 workers on 8 cores / 8GB: DUCKDB_THREADS=2,
+# DUCKDB_MEMORY_LIMIT=1GB). Operators that outgrow the limit spill to
+# DUCKDB_TEMP_DIRECTORY instead of failing.
+MEMORY_LIMIT = os.environ.get("DUCKDB_MEMORY_LIMIT", "1GB")
+THREADS = int(os.environ.get("DUCKDB_THREADS", str(min(4, os.cpu_count() or 1))))
+TEMP_DIRECTORY = Path(
+    os.environ.get("DUCKDB_TEMP_DIRECTORY", Path(tempfile.gettempdir()) / "dash-duckdb")
+)
+
+# Resource classes queries can run under. Known-heavy queries (full pbp
+# scans, exports) pass resources="heavy" to run on a separate database with
+# its own budget, so they spill early instead of starving page callbacks.
+RESOURCE_CLASSES = {
+    "default": {
+        "pool_size": POOL_SIZE,
+        "memory_limit": MEMORY_LIMIT,
+        "threads": THREADS,
+    },
+    "heavy": {
+        "pool_size": int(os.environ.get("DUCKDB_HEAVY_POOL_SIZE", "1")),
+        "memory_limit": os.environ.get("DUCKDB_HEAVY_MEMORY_LIMIT", "512MB"),
+        "threads": int(os.environ.get("DUCKDB_HEAVY_THREADS", str(THREADS))),
+    },
+}
+
+# Result cache limits: entries kept, seconds an entry stays valid, and the
+# largest result (in rows) worth keeping in memory
+CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "128"))
+CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", "300"))
+CACHE_MAX_ROWS = int(os.environ.get("QUERY_CACHE_MAX_ROWS", "100000"))
+
+# Instrumentation: queries at or above SLOW_QUERY_MS are logged, the last
+# STATS_WINDOW timings per query feed the percentiles, and QUERY_PROFILE=1
+# captures DuckDB's JSON profile for each executed query
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "500"))
+STATS_WINDOW = int(os.environ.get("QUERY_STATS_WINDOW", "1000"))
+SLOW_LOG_SIZE = int(os.environ.get("SLOW_QUERY_LOG_SIZE", "200"))
+PROFILE_QUERIES = os.environ.get("QUERY_PROFILE", "0") == "1"
+
+# Queries run on an executor with one worker per pooled cursor and are
+# interrupted after QUERY_TIMEOUT seconds (0 disables the timeout)
+QUERY_TIMEOUT = float(os.environ.get("QUERY_TIMEOUT", "30"))
+
+# Concurrent identical queries (same SQL, params and data files) share one
+# execution instead of each running on its own cursor
+SINGLE_FLIGHT = os.environ.get("QUERY_SINGLE_FLIGHT", "1") == "1"
+
+# Cookie app.py sets to tell browser sessions apart for cancellation
+SESSION_COOKIE = "dash_session"
+
+# Result formats query_parquet() and run_query() can return
+OUTPUT_FORMATS = ("pandas", "arrow")
+
+# Rows per Arrow record batch for stream_batches() and export_query()
+BATCH_SIZE = int(os.environ.get("QUERY_BATCH_SIZE", "100000"))
+
+
+class QueryTimeout(TimeoutError):
+    """Raised when a query runs past its timeout and is interrupted."""
+
+
+class QueryCancelled(Exception):
+    """Raised when a newer request with the same cancel key supersedes a query."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of cursors on a single in-memory DuckDB database.
+
+    DuckDB connections must not be shared between threads, but cursors
+    created from the same database can each be used by one thread at a
+    time while sharing its caches.
+
+    memory_limit and threads are database settings, so they bound all of
+    the pool's cursors together; work past the memory limit spills to a
+    temp directory private to this pool.
+    """
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        memory_limit: str = MEMORY_LIMIT,
+        threads: int = THREADS,
+        materialize: bool = True,
+    ):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        if threads < 1:
+            raise ValueError(f"Threads must be at least 1, got {threads}")
+
+        self.size = size
+        self.memory_limit = memory_limit
+        self.threads = threads
+        # DuckDB creates (and on close removes) the spill directory itself,
+        # so each database gets its own below TEMP_DIRECTORY
+        TEMP_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        self.temp_directory = TEMP_DIRECTORY / f"{os.getpid()}-{id(self):x}"
+        self._materialize = MATERIALIZE if materialize else []
+
+        self._database = duckdb.connect(
+            database=":memory:",
+            config={
+                "memory_limit": memory_limit,
+                "threads": threads,
+                "temp_directory": str(self.temp_directory),
+            },
+        )
+        # Keep parquet footers cached across queries
+        self._database.execute("SET enable_object_cache=true")
+
+        self._cursors = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._cursors.put(self._new_cursor())
+
+        # Names of the registered queries already prepared on each cursor
+        self._prepared = {}
+
+        # View name -> {"kind", "stamp", "bytes"} for registered datasets
+        self._datasets = {}
+        self._datasets_lock = threading.Lock()
+        self.refresh_datasets()
+
+    def refresh_datasets(self, names=None):
+        """
+        Create, replace or drop dataset views and tables whose files changed.
+
+        Cheap when nothing changed: one stat per file, no locking.
+
+        Args:
+            names: Datasets to check (all of DATASETS by default)
+        """
+        names = list(DATASETS) if names is None else names
+        stale = [
+            name
+            for name in names
+            if self._datasets.get(name, {}).get("stamp")
+            != _file_stamps(_dataset_files(name))
+        ]
+        if not stale:
+            return
+
+        with self._datasets_lock:
+            for name in stale:
+                files = _dataset_files(name)
+                stamp = _file_stamps(files)
+                current = self._datasets.get(name)
+                # Another thread may have refreshed it while this one waited
+                if current is not None and current["stamp"] == stamp:
+                    continue
+                if not stamp or any(mtime is None for _, mtime, _ in stamp):
+                    if current is not None:
+                        self._drop_dataset(name, current["kind"])
+                    continue
+
+                size = sum(
+                    _catalog.metadata(os.path.relpath(file, DATA_DIR))[
+                        "uncompressed_bytes"
+                    ]
+                    for file in files
+                )
+                used = sum(
+                    d["bytes"]
+                    for other, d in self._datasets.items()
+                    if d["kind"] == "table" and other != name
+                )
+                if (
+                    name in self._materialize
+                    and used + size <= MATERIALIZE_BUDGET_MB * 1e6
+                ):
+                    kind = "table"
+                else:
+                    kind = "view"
+
+                # Replaced in one statement, so queries running meanwhile
+                # see either the old or the new data, never a missing name
+                if current is not None and current["kind"] != kind:
+                    self._drop_dataset(name, current["kind"])
+                self._database.execute(
+                    f"CREATE OR REPLACE {kind.upper()} {name}"
+                    f" AS SELECT * FROM {_dataset_source(name)}"
+                )
+                self._datasets[name] = {"kind": kind, "stamp": stamp, "bytes": size}
+
+    def _drop_dataset(self, name: str, kind: str):
+        """Drop a dataset's view or table (caller holds _datasets_lock)."""
+        self._database.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+        self._datasets.pop(name, None)
+
+    def datasets(self) -> dict:
+        """Registered datasets and whether each is an in-memory table or a view."""
+        with self._datasets_lock:
+            return {name: dict(info) for name, info in self._datasets.items()}
+
+    def usage(self) -> dict:
+        """Configured limits plus current buffer memory and spilled bytes."""
+        # A short-lived cursor, so busy pools can still be inspected
+        conn = self._database.cursor()
+        try:
+            memory, spilled = conn.execute(
+                "SELECT SUM(memory_usage_bytes), SUM(temporary_storage_bytes)"
+                " FROM duckdb_memory()"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {
+            "memory_limit": self.memory_limit,
+            "threads": self.threads,
+            "temp_directory": str(self.temp_directory),
+            "memory_bytes": int(memory or 0),
+            "temp_bytes": int(spilled or 0),
+        }
+
+    def _new_cursor(self):
+        cursor = self._database.cursor()
+        # Session setting, so it has to be applied to every cursor
+        cursor.execute(f"SET file_search_path='{DATA_DIR}'")
+        return cursor
+
+    @contextmanager
+    def cursor(self):
+        """Borrow a cursor, blocking until one is free."""
+        cursor = self._cursors.get()
+        try:
+            yield cursor
+        finally:
+            self._cursors.put(cursor)
+
+    def execute_prepared(self, cursor, query, params: list):
+        """
+        Run a registered query on a borrowed cursor, preparing it first if
+        this cursor has not seen it yet.
+        """
+        prepared = self._prepared.setdefault(id(cursor), set())
+        statement = f"EXECUTE {query.name}"
+        if params:
+            statement += f"({', '.join(map(_sql_literal, params))})"
+        if query.name not in prepared:
+            cursor.execute(f"PREPARE {query.name} AS {query.prepared_sql}")
+            prepared.add(query.name)
+            return cursor.execute(statement)
+
+        try:
+            return cursor.execute(statement)
+        except (duckdb.BinderException, duckdb.CatalogException):
+            # The plan is stale (e.g. a file was rewritten with a new schema
+            # or a table replaced), so prepare it again and retry once.
+            # Anything else, such as a bad parameter, fails as it is.
+            cursor.execute(f"DEALLOCATE PREPARE {query.name}")
+            cursor.execute(f"PREPARE {query.name} AS {query.prepared_sql}")
+            return cursor.execute(statement)
+
+    def close(self):
+        """Close every idle cursor and the underlying database."""
+        while True:
+            try:
+                self._cursors.get_nowait().close()
+            except queue.Empty:
+                break
+        self._database.close()
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+_executors = {}
+
+
+def _resource_class(resources: str) -> dict:
+    settings = RESOURCE_CLASSES.get(resources)
+    if settings is None:
+        raise ValueError(
+            f"resources must be one of {tuple(RESOURCE_CLASSES)}, got {resources!r}"
+        )
+    return settings
+
+
+def _new_pool(resources: str, size: int = None) -> ConnectionPool:
+    settings = _resource_class(resources)
+    return ConnectionPool(
+        size or settings["pool_size"],
+        memory_limit=settings["memory_limit"],
+        threads=settings["threads"],
+        # Heavy queries scan the big datasets; keep small tables in one place
+        materialize=resources == "default",
+    )
+
+
+def get_pool(resources: str = "default") -> ConnectionPool:
+    """
+    Return the process-wide connection pool, creating it on first use.
+
+    Args:
+        resources: Resource class (a key of RESOURCE_CLASSES)
+
+    Returns:
+        The shared ConnectionPool for that resource class
+    """
+    with _pool_lock:
+        pool = _pools.get(resources)
+        if pool is None:
+            pool = _pools[resources] = _new_pool(resources)
+        return pool
+
+
+def configure_pool(
+    size: int = None,
+    resources: str = "default",
+    memory_limit: str = None,
+    threads: int = None,
+) -> ConnectionPool:
+    """
+    Replace a process-wide pool with a new one of the given size and limits.
+
+    Queries already running on the old pool finish normally; the old
+    database is closed once its idle cursors are drained.
+
+    Args:
+        size: Number of cursors to keep open (default: unchanged)
+        resources: Resource class to reconfigure
+        memory_limit: DuckDB memory limit, e.g. "2GB" (default: unchanged)
+        threads: DuckDB worker threads (default: unchanged)
+
+    Returns:
+        The new ConnectionPool
+    """
+    settings = _resource_class(resources)
+    for key, value in (
+        ("pool_size", size),
+        ("memory_limit", memory_limit),
+        ("threads", threads),
+    ):
+        if value is not None:
+            settings[key] = value
+
+    new_pool = _new_pool(resources)
+    with _pool_lock:
+        old_pool = _pools.get(resources)
+        _pools[resources] = new_pool
+        # The next query builds an executor sized to the new pool
+        old_executor = _executors.pop(resources, None)
+    if old_executor is not None:
+        # Queries already queued on it still run, on the new pool
+        old_executor.shutdown(wait=False)
+    if old_pool is not None:
+        old_pool.close()
+    return new_pool
+
+
+def close_pool():
+    """Close every process-wide pool. The next query opens a fresh one."""
+    with _pool_lock:
+        old_pools = list(_pools.values())
+        _pools.clear()
+        old_executors = list(_executors.values())
+        _executors.clear()
+    for old_executor in old_executors:
+        old_executor.shutdown(wait=False)
+    for old_pool in old_pools:
+        old_pool.close()
+
+
+def dataset_info() -> dict:
+    """
+    Describe the registered dataset views.
+
+    Returns:
+        Dictionary of view name to kind ("table" if held in memory, "view"
+        if scanned from parquet on demand), file stamp and estimated bytes
+    """
+    return get_pool().datasets()
+
+
+def refresh_datasets():
+    """Re-register any dataset whose parquet file was added or rewritten."""
+    with _pool_lock:
+        pools = list(_pools.values())
+    for pool in pools or [get_pool()]:
+        pool.refresh_datasets()
+
+
+def resource_usage() -> dict:
+    """
+    Report limits and current usage of each open pool's database.
+
+    Returns:
+        Dictionary of resource class to memory_limit, threads,
+        temp_directory, memory_bytes (buffer memory in use) and temp_bytes
+        (data spilled to the temp directory)
+    """
+    with _pool_lock:
+        pools = dict(_pools)
+    return {resources: pool.usage() for resources, pool in pools.items()}
+
+
+def _get_executor(resources: str = "default") -> ThreadPoolExecutor:
+    with _pool_lock:
+        executor = _executors.get(resources)
+        if executor is None:
+            # One worker per cursor: more would only wait for a cursor, and
+            # fewer would leave queries queued (and timing out) while
+            # cursors sit idle
+            pool = _pools.get(resources)
+            if pool is not None:
+                workers = pool.size
+            else:
+                workers = _resource_class(resources)["pool_size"]
+            executor = _executors[resources] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix=f"duckdb-{resources}"
+            )
+        return executor
+
+
+def _forget_pool_after_fork():
+    # DuckDB handles and executor threads cannot cross a fork, so worker
+    # processes start fresh
+    global _pools, _pool_lock, _executors
+    _pools = {}
+    _executors = {}
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+# Quoted file references such as 'nfl_team_games.parquet' or 'pbp/*.parquet'
+_PARQUET_REF = re.compile(r"'([^']+\.parquet)'", re.IGNORECASE)
+# Registered dataset views referenced by name
+_DATASET_REF = re.compile(r"\b(" + "|".join(DATASETS) + r")\b", re.IGNORECASE)
+
+
+def _partition_dir(name: str):
+    """Hive partition directory for a dataset, if it has been written."""
+    if name not in PARTITIONED_DATASETS:
+        return None
+    path = DATA_DIR / PARTITIONED_DATASETS[name]
+    return path if path.is_dir() else None
+
+
+def _dataset_files(name: str) -> list:
+    """Parquet files backing a dataset view."""
+    partition_dir = _partition_dir(name)
+    if partition_dir is not None:
+        return sorted(
+            glob.glob(str(partition_dir / "**" / "*.parquet"), recursive=True)
+        )
+    return sorted(glob.glob(str(DATA_DIR / DATASETS[name])))
+
+
+def _dataset_source(name: str) -> str:
+    """read_parquet() call for a dataset, preferring its partitioned layout."""
+    partition_dir = _partition_dir(name)
+    if partition_dir is not None:
+        return (
+            f"read_parquet('{partition_dir}/**/*.parquet', "
+            f"hive_partitioning = true, hive_types = {HIVE_TYPES}, "
+            "union_by_name = true)"
+        )
+    # Seasons are written separately, so a column a later season added is
+    # null in the earlier ones and a retyped column reads as the wider type
+    return f"read_parquet('{DATA_DIR / DATASETS[name]}', union_by_name = true)"
+
+
+def _referenced_datasets(sql: str) -> list:
+    """Registered dataset names used in a query (outside string literals)."""
+    code = " ".join(sql.split("'")[::2])
+    return sorted({match.lower() for match in _DATASET_REF.findall(code)})
 
-def query_parquet(sql: str, params: list = None) -> pd.DataFrame:
+
+def _normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside of string literals."""
+    parts = sql.strip().split("'")
+    parts[::2] = [re.sub(r"\s+", " ", part) for part in parts[::2]]
+    return "'".join(parts)
+
+
+def _referenced_files(sql: str) -> list:
+    """Resolve the parquet files a query reads, expanding globs."""
+    refs = _PARQUET_REF.findall(sql)
+    datasets = _referenced_datasets(sql)
+    if not refs and not datasets:
+        # Can't tell what the query touches, so depend on the whole directory
+        refs = ["*.parquet"]
+
+    files = set()
+    for name in datasets:
+        files.update(_dataset_files(name))
+    for ref in refs:
+        path = Path(ref)
+        if not path.is_absolute():
+            path = DATA_DIR / path
+        if glob.has_magic(str(path)):
+            files.update(glob.glob(str(path), recursive=True))
+        else:
+            files.add(str(path))
+    return sorted(files)
+
+
+def _file_stamps(files: list) -> tuple:
+    """(path, mtime, size) for each file; missing files get None."""
+    stamps = []
+    for file in files:
+        try:
+            stat = os.stat(file)
+            stamps.append((file, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append((file, None, None))
+    return tuple(stamps)
+
+
+def _copy_result(result):
+    # DataFrames are mutable, Arrow tables are not and can be shared
+    return result.copy() if isinstance(result, pd.DataFrame) else result
+
+
+class ResultCache:
+    """
+    LRU cache of query results with a time-to-live.
+
+    Keys include the modification time and size of every parquet file the
+    query reads, so reloading data makes old entries unreachable; they age
+    out through the TTL or LRU eviction.
+    """
+
+    def __init__(
+        self, size: int = CACHE_SIZE, ttl: float = CACHE_TTL, max_rows=CACHE_MAX_ROWS
+    ):
+        self.size = size
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ["hits", "misses", "stores", "evictions", "expirations", "skipped"], 0
+        )
+
+    def key(self, sql: str, params, output: str = "pandas") -> tuple:
+        """Build the cache key for a query, its parameters and output format."""
+        params = tuple(params) if params else ()
+        return (
+            _normalize_sql(sql),
+            repr(params),
+            output,
+            _file_stamps(_referenced_files(sql)),
+        )
+
+    def get(self, key):
+        """Return a copy of the cached result, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        return _copy_result(result)
+
+    def put(self, key, result):
+        """Store a copy of result, evicting the least recently used entry."""
+        if self.size < 1 or len(result) > self.max_rows:
+            with self._lock:
+                self._counters["skipped"] += 1
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), _copy_result(result))
+            self._entries.move_to_end(key)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters plus current size and limits."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "size": self.size,
+                "ttl": self.ttl,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+            }
+
+
+_cache = ResultCache()
+
+
+def cache_stats() -> dict:
+    """
+    Report result cache counters for sizing.
+
+    Returns:
+        Dictionary with hits, misses, stores, evictions, expirations,
+        skipped (results too large to cache), entries, size, ttl, hit_rate
+    """
+    return _cache.stats()
+
+
+def clear_cache():
+    """Empty the result cache."""
+    _cache.clear()
+
+
+def configure_cache(
+    size: int = CACHE_SIZE, ttl: float = CACHE_TTL, max_rows: int = CACHE_MAX_ROWS
+):
+    """
+    Replace the result cache with one using new limits (size 0 disables it).
+
+    Args:
+        size: Maximum number of cached results
+        ttl: Seconds before an entry expires
+        max_rows: Results with more rows than this are not cached
+    """
+    global _cache
+    _cache = ResultCache(size, ttl, max_rows)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _caller() -> tuple:
+    """(module, function) of the code that called into this module."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return ("unknown", "unknown")
+    return (frame.f_globals.get("__name__", "unknown"), frame.f_code.co_name)
+
+
+def _result_bytes(result) -> int:
+    if isinstance(result, pd.DataFrame):
+        # Shallow count: object columns are counted as pointers
+        return int(result.memory_usage(index=True, deep=False).sum())
+    return result.nbytes
+
+
+def _profile_path(cursor) -> str:
+    return os.path.join(
+        tempfile.gettempdir(), f"duckdb_profile_{os.getpid()}_{id(cursor)}.json"
+    )
+
+
+def _read_profile(path: str):
+    """Load DuckDB's JSON profile, falling back to the raw text."""
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class QueryStats:
+    """
+    Rolling per-query timings plus a log of slow queries.
+
+    Timings are grouped by query label (the registered name, or the
+    normalized SQL for ad-hoc queries) and by the page module and
+    callback that ran them.
+    """
+
+    def __init__(
+        self,
+        window: int = STATS_WINDOW,
+        slow_ms: float = SLOW_QUERY_MS,
+        profile: bool = PROFILE_QUERIES,
+    ):
+        self.window = window
+        self.slow_ms = slow_ms
+        self.profile = profile
+        self._series = {}
+        self._slow = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        label,
+        caller,
+        ms,
+        rows,
+        nbytes,
+        cached,
+        params,
+        profile=None,
+        coalesced=False,
+    ):
+        """Add one call's measurements."""
+        page, callback = caller
+        with self._lock:
+            series = self._series.get((label, page, callback))
+            if series is None:
+                series = self._series[(label, page, callback)] = {
+                    "times": deque(maxlen=self.window),
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "coalesced": 0,
+                    "rows": 0,
+                    "bytes": 0,
+                    "max_ms": 0.0,
+                    "last_profile": None,
+                }
+            series["times"].append(ms)
+            series["calls"] += 1
+            series["cache_hits"] += int(cached)
+            series["coalesced"] += int(coalesced)
+            series["rows"] += rows
+            series["bytes"] += nbytes
+            series["max_ms"] = max(series["max_ms"], ms)
+            if profile is not None:
+                series["last_profile"] = profile
+
+            # Waiting on another caller's execution isn't a slow query of its own
+            slow = ms >= self.slow_ms and not cached and not coalesced
+            if slow:
+                entry = {
+                    "time": time.time(),
+                    "label": label,
+                    "page": page,
+                    "callback": callback,
+                    "ms": ms,
+                    "rows": rows,
+                    "bytes": nbytes,
+                    "params": params,
+                    "profile": profile,
+                }
+                self._slow.append(entry)
+
+        if slow:
+            logger.warning(
+                "Slow query (%.0f ms, %d rows) from %s.%s: %s params=%r",
+                ms,
+                rows,
+                page,
+                callback,
+                label,
+                params,
+            )
+
+    def table(self) -> pd.DataFrame:
+        """Summary row per (label, page, callback)."""
+        with self._lock:
+            rows = []
+            for (label, page, callback), series in self._series.items():
+                times = np.fromiter(series["times"], dtype=float)
+                rows.append(
+                    {
+                        "label": label,
+                        "page": page,
+                        "callback": callback,
+                        "calls": series["calls"],
+                        "cache_hits": series["cache_hits"],
+                        "coalesced": series["coalesced"],
+                        "p50_ms": float(np.percentile(times, 50)),
+                        "p95_ms": float(np.percentile(times, 95)),
+                        "max_ms": series["max_ms"],
+                        "avg_rows": series["rows"] / series["calls"],
+                        "avg_bytes": series["bytes"] / series["calls"],
+                        "last_profile": series["last_profile"],
+                    }
+                )
+        columns = [
+            "label",
+            "page",
+            "callback",
+            "calls",
+            "cache_hits",
+            "coalesced",
+            "p50_ms",
+            "p95_ms",
+            "max_ms",
+            "avg_rows",
+            "avg_bytes",
+            "last_profile",
+        ]
+        return pd.DataFrame(rows, columns=columns).sort_values(
+            "p95_ms", ascending=False, ignore_index=True
+        )
+
+    def slow_queries(self) -> list:
+        """Most recent slow queries, oldest first."""
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._slow.clear()
+
+
+_stats = QueryStats()
+
+
+def query_stats() -> pd.DataFrame:
+    """
+    Dump rolling query statistics for inspection.
+
+    Returns:
+        DataFrame with one row per query label and calling page/callback:
+        calls, cache_hits, coalesced (served by a concurrent identical
+        query), p50_ms, p95_ms, max_ms, avg_rows, avg_bytes and
+        the last DuckDB profile (when profiling is on), slowest first
+    """
+    return _stats.table()
+
+
+def slow_queries() -> list:
+    """
+    Return the slow-query log.
+
+    Returns:
+        List of dicts (time, label, page, callback, ms, rows, bytes, params,
+        profile) for queries that took at least SLOW_QUERY_MS
+    """
+    return _stats.slow_queries()
+
+
+def reset_query_stats():
+    """Clear collected timings, the slow-query log and single-flight counters."""
+    _stats.reset()
+    _single_flight.reset()
+
+
+def configure_instrumentation(
+    slow_ms: float = None, profile: bool = None, window: int = None
+):
+    """
+    Adjust instrumentation settings at runtime.
+
+    Args:
+        slow_ms: Threshold in milliseconds for the slow-query log
+        profile: Capture DuckDB's JSON profile for every executed query
+        window: Number of recent timings kept per query for percentiles
+            (applies to queries seen after the change)
+    """
+    if slow_ms is not None:
+        _stats.slow_ms = slow_ms
+    if profile is not None:
+        _stats.profile = profile
+    if window is not None:
+        _stats.window = window
+
+
+NamedQuery = namedtuple(
+    "NamedQuery", ["name", "sql", "prepared_sql", "n_params", "resources"]
+)
+
+_registry = {}
+_registry_lock = threading.Lock()
+_QUERY_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _number_placeholders(sql: str) -> tuple:
+    """Rewrite ? placeholders (outside string literals) as $1, $2, ..."""
+    parts = sql.split("'")
+    count = 0
+    for i in range(0, len(parts), 2):
+        pieces = parts[i].split("?")
+        numbered = pieces[0]
+        for piece in pieces[1:]:
+            count += 1
+            numbered += f"${count}{piece}"
+        parts[i] = numbered
+    return "'".join(parts), count
+
+
+def _sql_literal(value) -> str:
+    """Render a bound parameter as a typed SQL literal for EXECUTE."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        if not math.isfinite(value):
+            # EXECUTE only takes literals, and nan/inf are not bare ones
+            return f"'{value}'::DOUBLE"
+        return repr(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, datetime.datetime):
+        return f"TIMESTAMP '{value.isoformat(sep=' ')}'"
+    if isinstance(value, datetime.date):
+        return f"DATE '{value.isoformat()}'"
+    raise TypeError(f"Unsupported query parameter type: {type(value).__name__}")
+
+
+def register_query(name: str, sql: str, resources: str = "default") -> NamedQuery:
+    """
+    Declare a named query with ? placeholders for its parameters.
+
+    Each pooled cursor prepares the statement the first time it runs it
+    and reuses the plan afterwards. Registering the same name again with
+    identical SQL is a no-op, so pages can register at import time.
+
+    Args:
+        name: Identifier used to run the query (letters, digits, underscore)
+        sql: SQL query string with ? placeholders
+        resources: Resource class the query runs under ("heavy" for
+            known-heavy queries, see query_parquet())
+
+    Returns:
+        The registered NamedQuery
+
+    Examples:
+        register_query(
+            "team_season_points",
+            "SELECT week, points FROM 'nfl_team_games.parquet' "
+            "WHERE season = ? AND posteam = ?",
+        )
+        df = run_query("team_season_points", [2024, "KC"])
+    """
+    if not _QUERY_NAME.match(name):
+        raise ValueError(f"Invalid query name {name!r}")
+
+    _resource_class(resources)
+
+    prepared_sql, n_params = _number_placeholders(sql)
+    query = NamedQuery(name, sql, prepared_sql, n_params, resources)
+    with _registry_lock:
+        existing = _registry.get(name)
+        if existing is not None and existing != query:
+            raise ValueError(
+                f"Query {name!r} is already registered with other SQL or resources"
+            )
+        _registry[name] = query
+    return query
+
+
+def _fetch(relation, output: str):
+    if output == "arrow":
+        return relation.fetch_arrow_table()
+    return relation.fetchdf()
+
+
+class _QueryTicket:
+    """Tracks the cursor a query is running on so it can be interrupted."""
+
+    def __init__(self):
+        self.cursor = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def attach(self, cursor):
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelled("Query was cancelled before it started")
+            self.cursor = cursor
+
+    def detach(self):
+        with self._lock:
+            self.cursor = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self.cursor is not None:
+                self.cursor.interrupt()
+
+
+_active = {}
+_active_lock = threading.Lock()
+
+
+def _claim_cancel_key(cancel_key, ticket: _QueryTicket):
+    """Register ticket under cancel_key, cancelling the query it supersedes."""
+    if cancel_key is None:
+        return
+    with _active_lock:
+        superseded = _active.get(cancel_key)
+        _active[cancel_key] = ticket
+    if superseded is not None:
+        superseded.cancel()
+
+
+def _release_cancel_key(cancel_key, ticket: _QueryTicket):
+    if cancel_key is None:
+        return
+    with _active_lock:
+        if _active.get(cancel_key) is ticket:
+            del _active[cancel_key]
+
+
+def cancel_queries(cancel_key) -> bool:
+    """
+    Interrupt the in-flight query registered under cancel_key, if any.
+
+    Returns:
+        True if a query was cancelled
+    """
+    with _active_lock:
+        ticket = _active.pop(cancel_key, None)
+    if ticket is None:
+        return False
+    ticket.cancel()
+    return True
+
+
+def callback_key(tab_id=None):
+    """
+    Identify the current browser tab and callback outputs.
+
+    Pass the result as cancel_key so that a newer run of the same callback
+    from the same tab cancels the query it supersedes. Every tab of a
+    browser shares the session cookie, so pages pass a per-tab id: a
+    dcc.Store holding a uuid made by the layout, passed as State. Without
+    one, the key falls back to the session, and tabs showing the same page
+    cancel each other's queries.
+
+    Args:
+        tab_id: Id of the browser tab the callback came from
+
+    Returns:
+        Hashable key, or None when not called from a Dash callback
+    """
+    import flask
+    from dash import callback_context
+
+    if not flask.has_request_context():
+        return None
+    try:
+        outputs = callback_context.outputs_list
+    except Exception:
+        return None
+
+    request = flask.request
+    session = (
+        tab_id
+        or request.cookies.get(SESSION_COOKIE)
+        or (
+            request.remote_addr,
+            request.headers.get("User-Agent"),
+        )
+    )
+    if isinstance(outputs, dict):
+        outputs = [outputs]
+    return (session, repr([(o["id"], o["property"]) for o in outputs]))
+
+
+def _run_on_pool(
+    run, output: str, ticket: _QueryTicket, profiling: bool, datasets, resources
+):
+    """Executor task: borrow a cursor, run the query, fetch the result."""
+    profile = None
+    pool = get_pool(resources)
+    if datasets:
+        pool.refresh_datasets(datasets)
+    with pool.cursor() as conn:
+        ticket.attach(conn)
+        try:
+            if profiling:
+                profile_path = _profile_path(conn)
+                conn.execute("SET enable_profiling='json'")
+                conn.execute(f"SET profiling_output='{profile_path}'")
+                try:
+                    result = _fetch(run(pool, conn), output)
+                    profile = _read_profile(profile_path)
+                finally:
+                    conn.execute("RESET enable_profiling")
+            else:
+                result = _fetch(run(pool, conn), output)
+        except duckdb.InterruptException as e:
+            raise QueryCancelled(str(e)) from e
+        finally:
+            ticket.detach()
+    return result, profile
+
+
+def _run_with_timeout(
+    run, output: str, timeout: float, cancel_key, datasets, resources="default"
+):
+    """Submit a query to the executor and wait, interrupting it on timeout."""
+    ticket = _QueryTicket()
+    _claim_cancel_key(cancel_key, ticket)
+    try:
+        future = _get_executor(resources).submit(
+            _run_on_pool, run, output, ticket, _stats.profile, datasets, resources
+        )
+        try:
+            return future.result(timeout=timeout if timeout > 0 else None)
+        except FutureTimeout:
+            ticket.cancel()
+            raise QueryTimeout(f"Query exceeded {timeout:g}s and was interrupted")
+    finally:
+        _release_cancel_key(cancel_key, ticket)
+
+
+class _Flight:
+    """One in-flight execution and the outcome its waiters receive."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.profile = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical queries into one execution.
+
+    The first caller for a key runs the query; callers arriving while it is
+    in flight wait for its result instead of borrowing another cursor.
+    Keys are result cache keys, so they already include the data version.
+    """
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT):
+        self.enabled = enabled
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(["executions", "coalesced"], 0)
+
+    def run(self, key, execute, timeout: float, cancel_key=None) -> tuple:
+        """
+        Return execute()'s (result, profile) for key, running it only if no
+        identical query is already in flight.
+
+        Returns:
+            (result, profile, coalesced) where coalesced is True if this
+            caller waited on another caller's execution
+        """
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                    self._counters["executions"] += 1
+                else:
+                    flight.waiters += 1
+
+            if leader:
+                try:
+                    result, profile = execute()
+                except BaseException as e:
+                    self._finish(key, flight, error=e)
+                    raise
+                self._finish(key, flight, result=result, profile=profile)
+                return result, profile, False
+
+            self._wait(flight, timeout, cancel_key)
+            if isinstance(flight.error, QueryCancelled):
+                # The leader was superseded, not this caller: run it again
+                continue
+            if flight.error is not None:
+                raise copy.copy(flight.error)
+            with self._lock:
+                self._counters["coalesced"] += 1
+            return _copy_result(flight.result), flight.profile, True
+
+    def _finish(self, key, flight: _Flight, result=None, profile=None, error=None):
+        with self._lock:
+            del self._flights[key]
+            waiters = flight.waiters
+        if error is not None:
+            flight.error = error
+        elif waiters:
+            # Waiters copy from a private copy the leader's caller can't touch
+            flight.result = _copy_result(result)
+            flight.profile = profile
+        flight.done.set()
+
+    def _wait(self, flight: _Flight, timeout: float, cancel_key):
+        # Waiters hold a ticket too, so a newer request can supersede them
+        ticket = _QueryTicket()
+        _claim_cancel_key(cancel_key, ticket)
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        try:
+            while not flight.done.wait(0.05):
+                if ticket.cancelled:
+                    raise QueryCancelled("Superseded while waiting for a query")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise QueryTimeout(f"Query exceeded {timeout:g}s")
+        finally:
+            _release_cancel_key(cancel_key, ticket)
+
+    def stats(self) -> dict:
+        """Counters plus the number of queries currently in flight."""
+        with self._lock:
+            calls = self._counters["executions"] + self._counters["coalesced"]
+            return {
+                **self._counters,
+                "in_flight": len(self._flights),
+                "saved_rate": self._counters["coalesced"] / calls if calls else 0.0,
+            }
+
+    def reset(self):
+        """Zero the counters."""
+        with self._lock:
+            self._counters = dict.fromkeys(self._counters, 0)
+
+
+_single_flight = SingleFlight()
+
+
+def single_flight_stats() -> dict:
+    """
+    Report how many executions single-flight coalescing saved.
+
+    Returns:
+        Dictionary with executions (queries actually run), coalesced
+        (callers served by another caller's execution), in_flight and
+        saved_rate (coalesced / all callers)
+    """
+    return _single_flight.stats()
+
+
+def configure_single_flight(enabled: bool = SINGLE_FLIGHT):
+    """Turn coalescing of concurrent identical queries on or off."""
+    _single_flight.enabled = enabled
+
+
+def _execute(
+    sql: str,
+    params: list,
+    cache: bool,
+    output: str,
+    run,
+    label=None,
+    timeout: float = None,
+    cancel_key=None,
+    resources: str = "default",
+):
+    """
+    Serve a query from the result cache or run it on the query executor,
+    and record its timing.
+
+    run(pool, cursor) executes the statement and returns the DuckDB result.
+    """
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"output must be one of {OUTPUT_FORMATS}, got {output!r}")
+    _resource_class(resources)
+
+    start = time.perf_counter()
+    label = label or _normalize_sql(sql)
+
+    if cache:
+        key = _cache.key(sql, params, output)
+        cached = _cache.get(key)
+        if cached is not None:
+            if cancel_key is not None:
+                # Still supersede whatever this request replaces
+                cancel_queries(cancel_key)
+            ms = (time.perf_counter() - start) * 1000
+            _stats.record(
+                label, _caller(), ms, len(cached), _result_bytes(cached), True, params
+            )
+            return cached
+
+    if timeout is None:
+        timeout = QUERY_TIMEOUT
+
+    def execute():
+        return _run_with_timeout(
+            run, output, timeout, cancel_key, _referenced_datasets(sql), resources
+        )
+
+    coalesced = False
+    if cache and _single_flight.enabled:
+        result, profile, coalesced = _single_flight.run(
+            key, execute, timeout, cancel_key
+        )
+    else:
+        result, profile = execute()
+
+    if cache and not coalesced:
+        _cache.put(key, result)
+
+    ms = (time.perf_counter() - start) * 1000
+    _stats.record(
+        label,
+        _caller(),
+        ms,
+        len(result),
+        _result_bytes(result),
+        False,
+        params,
+        profile,
+        coalesced=coalesced,
+    )
+    return result
+
+
+def run_query(
+    name: str,
+    params: list = None,
+    cache: bool = True,
+    output: str = "pandas",
+    timeout: float = None,
+    cancel_key=None,
+    resources: str = None,
+):
+    """
+    Execute a query declared with register_query().
+
+    Args:
+        name: Name the query was registered under
+        params: Values for the query's ? placeholders, in order
+        cache: Set False to bypass the result cache
+        output: "pandas" for a DataFrame or "arrow" for a pyarrow Table
+        timeout: Seconds before the query is interrupted (default
+            QUERY_TIMEOUT)
+        cancel_key: See query_parquet()
+        resources: Resource class to run under (default: the one the query
+            was registered with)
+
+    Returns:
+        DataFrame (or Arrow table) with query results
+    """
+    query = _registry.get(name)
+    if query is None:
+        raise KeyError(f"No query registered as {name!r}")
+
+    params = list(params) if params else []
+    if len(params) != query.n_params:
+        raise ValueError(
+            f"Query {name!r} takes {query.n_params} parameters, got {len(params)}"
+        )
+
+    return _execute(
+        query.sql,
+        params,
+        cache,
+        output,
+        lambda pool, conn: pool.execute_prepared(conn, query, params),
+        label=name,
+        timeout=timeout,
+        cancel_key=cancel_key,
+        resources=resources or query.resources,
+    )
+
+
+def query_parquet(
+    sql: str,
+    params: list = None,
+    cache: bool = True,
+    output: str = "pandas",
+    timeout: float = None,
+    cancel_key=None,
+    resources: str = "default",
+):
     """
     Execute SQL query on Parquet files using DuckDB.
 
+    Results are served from the result cache when the same query has run
+    recently and none of the files it reads have changed.
+
     Args:
         sql: SQL query string. Can reference parquet files directly.
         params: Optional list of parameters for parameterized queries.
+        cache: Set False for queries that must always hit the files
+            (e.g. ones using random() or now()).
+        output: "pandas" for a DataFrame, or "arrow" for a pyarrow Table
+            that skips the pandas conversion (see arrow_columns()).
+        timeout: Seconds before the query is interrupted and QueryTimeout
+            is raised (default QUERY_TIMEOUT, 0 for no limit)
+        cancel_key: Starting a query with the same key interrupts this one,
+            which then raises QueryCancelled. Use callback_key() in a
+            callback so a newer selection cancels the stale query.
+        resources: "heavy" for known-heavy queries (e.g. aggregating all of
+            pbp), which then run on a separate database with their own
+            memory and thread limits (see RESOURCE_CLASSES)
 
     Returns:
-        DataFrame with query results
+        DataFrame (or Arrow table) with query results
 
     Examples:
         # Query a single file
@@ -40,28 +1482,438 @@ def query_parquet(sql: str, params: list = None) -> pd.DataFrame:
             FROM 'plays.parquet' p
             JOIN 'teams.parquet' t ON p.team_id = t.id
         ''')
+
+        # Arrow table when a callback only needs a few columns for a trace
+        table = query_parquet(
+            "SELECT week, points FROM 'nfl_team_games.parquet'", output="arrow"
+        )
     """
-    conn = duckdb.connect(database=":memory:")
+    return _execute(
+        sql,
+        params,
+        cache,
+        output,
+        lambda pool, conn: conn.execute(sql, params) if params else conn.execute(sql),
+        timeout=timeout,
+        cancel_key=cancel_key,
+        resources=resources,
+    )
 
-    # Set data directory for relative paths
-    if DATA_DIR.exists():
-        conn.execute(f"SET file_search_path='{DATA_DIR}'")
 
-    try:
-        if params:
-            result = conn.execute(sql, params).fetchdf()
+def arrow_to_numpy(column) -> np.ndarray:
+    """
+    Convert an Arrow column to a NumPy array, without copying when possible.
+
+    Numeric columns held in one chunk with no nulls come back as read-only
+    views over the Arrow buffer. Anything else (nulls, strings, several
+    chunks) is converted once, with nulls as NaN or None.
+
+    Args:
+        column: pyarrow ChunkedArray or Array (e.g. table.column("week"))
+
+    Returns:
+        NumPy array that can be passed straight to a Plotly trace
+    """
+    if isinstance(column, pa.ChunkedArray):
+        if column.num_chunks == 1:
+            column = column.chunk(0)
         else:
-            result = conn.execute(sql).fetchdf()
+            column = column.combine_chunks()
+
+    numeric = pa.types.is_integer(column.type) or pa.types.is_floating(column.type)
+    return column.to_numpy(zero_copy_only=numeric and column.null_count == 0)
+
+
+def arrow_columns(table: pa.Table, *names: str) -> dict:
+    """
+    Pull columns out of an Arrow table as NumPy arrays for Plotly.
+
+    Args:
+        table: Result of query_parquet(..., output="arrow")
+        names: Columns to extract (all columns if none are given)
+
+    Returns:
+        Dictionary of column name to NumPy array
+
+    Examples:
+        table = run_query("team_season_points", [2024, "KC"], output="arrow")
+        cols = arrow_columns(table, "week", "points")
+        fig = go.Figure(go.Scatter(x=cols["week"], y=cols["points"]))
+    """
+    return {
+        name: arrow_to_numpy(table.column(name)) for name in names or table.column_names
+    }
+
+
+def stream_batches(
+    sql: str,
+    params: list = None,
+    batch_size: int = BATCH_SIZE,
+    timeout: float = None,
+    cancel_key=None,
+    resources: str = "default",
+):
+    """
+    Execute a query and yield its result as Arrow record batches.
+
+    Only one batch is materialized at a time, so large results (e.g.
+    exploratory SELECT * on pbp) can be written out or paged with bounded
+    memory. A pooled cursor is held until the generator is exhausted or
+    closed. Results are not cached.
+
+    Args:
+        sql: SQL query string
+        params: Optional list of parameters for parameterized queries
+        batch_size: Rows per record batch
+        timeout: Seconds before the stream is interrupted (default
+            QUERY_TIMEOUT, 0 for no limit)
+        cancel_key: See query_parquet()
+        resources: Resource class to run under (see query_parquet())
+
+    Yields:
+        pyarrow.RecordBatch
+
+    Examples:
+        for batch in stream_batches("SELECT * FROM pbp WHERE season = ?", [2024]):
+            handle(batch)
+    """
+    if timeout is None:
+        timeout = QUERY_TIMEOUT
+    caller = _caller()
+    start = time.perf_counter()
+    rows = nbytes = 0
+
+    ticket = _QueryTicket()
+    _claim_cancel_key(cancel_key, ticket)
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        ticket.cancel()
+
+    watchdog = threading.Timer(timeout, expire) if timeout > 0 else None
+
+    pool = get_pool(resources)
+    pool.refresh_datasets(_referenced_datasets(sql))
+    try:
+        with pool.cursor() as conn:
+            ticket.attach(conn)
+            if watchdog is not None:
+                watchdog.start()
+            try:
+                relation = conn.execute(sql, params) if params else conn.execute(sql)
+                reader = relation.fetch_record_batch(batch_size)
+                while True:
+                    try:
+                        batch = reader.read_next_batch()
+                    except StopIteration:
+                        break
+                    rows += batch.num_rows
+                    nbytes += batch.nbytes
+                    yield batch
+            except (duckdb.Error, pa.ArrowException, OSError) as e:
+                # Interrupts surface from DuckDB or, mid-stream, from Arrow
+                if not ticket.cancelled:
+                    raise
+                if timed_out.is_set():
+                    raise QueryTimeout(
+                        f"Stream exceeded {timeout:g}s and was interrupted"
+                    ) from e
+                raise QueryCancelled(str(e)) from e
+            finally:
+                ticket.detach()
     finally:
-        conn.close()
+        if watchdog is not None:
+            watchdog.cancel()
+        _release_cancel_key(cancel_key, ticket)
+        ms = (time.perf_counter() - start) * 1000
+        _stats.record(_normalize_sql(sql), caller, ms, rows, nbytes, False, params)
 
-    return result
+
+def export_query(
+    sql: str,
+    path,
+    params: list = None,
+    batch_size: int = BATCH_SIZE,
+    resources: str = "heavy",
+    timeout: float = 0,
+):
+    """
+    Stream a query's result into a parquet file with bounded memory.
+
+    The file is written next to path and moved into place once complete,
+    so a failed or interrupted export never leaves a truncated file.
+
+    Args:
+        sql: SQL query string
+        path: Output parquet file
+        params: Optional list of parameters for parameterized queries
+        batch_size: Rows held in memory at a time
+        resources: Resource class to run under (exports are heavy by
+            default, see query_parquet())
+        timeout: Seconds before the export is interrupted, counting the
+            time spent writing (default 0, no limit)
+
+    Returns:
+        Number of rows written
+    """
+    tmp_path = Path(f"{path}.tmp")
+    writer = None
+    rows = 0
+    try:
+        for batch in stream_batches(
+            sql, params, batch_size=batch_size, timeout=timeout, resources=resources
+        ):
+            if writer is None:
+                writer = pq.ParquetWriter(str(tmp_path), batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        tmp_path.unlink(missing_ok=True)
+    return rows
+
+
+def query_page(
+    sql: str,
+    params: list = None,
+    page: int = 0,
+    page_size: int = 100,
+    order_by: str = None,
+    output: str = "pandas",
+):
+    """
+    Fetch one page of a query's result with LIMIT/OFFSET.
+
+    Suited to dash_table.DataTable with page_action="custom": pass its
+    page_current and page_size. Pages are cached like any other query.
+
+    Args:
+        sql: SQL query string (without LIMIT/OFFSET)
+        params: Optional list of parameters for parameterized queries
+        page: Zero-based page number
+        page_size: Rows per page
+        order_by: ORDER BY clause applied to the result (e.g. "week, play_id").
+            Give one unless the query already orders its rows, or pages
+            may overlap.
+        output: "pandas" or "arrow"
+
+    Returns:
+        DataFrame (or Arrow table) with at most page_size rows
+    """
+    order = f" ORDER BY {order_by}" if order_by else ""
+    return query_parquet(
+        f"SELECT * FROM ({sql}) AS q{order} LIMIT ? OFFSET ?",
+        [*(params or []), page_size, page * page_size],
+        output=output,
+    )
+
+
+def query_keyset_page(
+    sql: str,
+    key_columns: list,
+    after: tuple = None,
+    params: list = None,
+    page_size: int = 100,
+    output: str = "pandas",
+) -> tuple:
+    """
+    Fetch the page of rows that follows a key, ordered by key_columns.
+
+    Unlike query_page(), the cost of a page does not grow with how deep it
+    is, because earlier rows are skipped by a filter rather than counted.
+    The key columns must identify rows uniquely (e.g. game_id, play_id).
+
+    Args:
+        sql: SQL query string
+        key_columns: Columns to order and page by
+        after: Key of the last row of the previous page (None for the first)
+        params: Optional list of parameters for parameterized queries
+        page_size: Rows per page
+        output: "pandas" or "arrow"
+
+    Returns:
+        (page, next_after): the rows, and the key to pass as after for the
+        next page (None when this was the last page)
+
+    Examples:
+        page, after = query_keyset_page("SELECT * FROM pbp", ["game_id", "play_id"])
+        while after is not None:
+            page, after = query_keyset_page(
+                "SELECT * FROM pbp", ["game_id", "play_id"], after=after
+            )
+    """
+    for column in key_columns:
+        if not _QUERY_NAME.match(column):
+            raise ValueError(f"Invalid key column {column!r}")
+
+    keys = ", ".join(f'"{column}"' for column in key_columns)
+    params = list(params or [])
+    where = ""
+    if after is not None:
+        if len(after) != len(key_columns):
+            raise ValueError("after must have one value per key column")
+        where = f" WHERE ({keys}) > ({', '.join('?' * len(after))})"
+        params += list(after)
+
+    result = query_parquet(
+        f"SELECT * FROM ({sql}) AS q{where} ORDER BY {keys} LIMIT ?",
+        [*params, page_size],
+        output=output,
+    )
+
+    if len(result) < page_size:
+        return result, None
+    if output == "arrow":
+        last = tuple(result.column(c)[-1].as_py() for c in key_columns)
+    else:
+        # to_dict() gives Python scalars, which DuckDB can bind
+        last = tuple(result[key_columns].tail(1).to_dict("records")[0].values())
+    return result, last
+
+
+# Arrow type names as DuckDB's DESCRIBE reports them
+_DUCKDB_TYPES = {
+    "bool": "BOOLEAN",
+    "int8": "TINYINT",
+    "int16": "SMALLINT",
+    "int32": "INTEGER",
+    "int64": "BIGINT",
+    "uint8": "UTINYINT",
+    "uint16": "USMALLINT",
+    "uint32": "UINTEGER",
+    "uint64": "UBIGINT",
+    "float": "FLOAT",
+    "double": "DOUBLE",
+    "string": "VARCHAR",
+    "large_string": "VARCHAR",
+    "binary": "BLOB",
+    "date32[day]": "DATE",
+}
+
+
+def _duckdb_type(arrow_type: pa.DataType) -> str:
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    if pa.types.is_timestamp(arrow_type):
+        return "TIMESTAMP WITH TIME ZONE" if arrow_type.tz else "TIMESTAMP"
+    return _DUCKDB_TYPES.get(str(arrow_type), str(arrow_type).upper())
+
+
+def _read_footer(path: Path, stat: os.stat_result) -> dict:
+    """Schema, row counts and row-group statistics from a parquet footer."""
+    metadata = pq.ParquetFile(path).metadata
+    schema = metadata.schema.to_arrow_schema()
+
+    row_groups = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        columns = {}
+        for j in range(row_group.num_columns):
+            chunk = row_group.column(j)
+            stats = chunk.statistics
+            columns[chunk.path_in_schema] = {
+                "min": stats.min if stats is not None and stats.has_min_max else None,
+                "max": stats.max if stats is not None and stats.has_min_max else None,
+                "null_count": stats.null_count if stats is not None else None,
+                "compressed_bytes": chunk.total_compressed_size,
+            }
+        row_groups.append({"num_rows": row_group.num_rows, "columns": columns})
+
+    return {
+        "name": path.name,
+        "path": str(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size_bytes": stat.st_size,
+        "num_rows": metadata.num_rows,
+        "num_row_groups": metadata.num_row_groups,
+        "uncompressed_bytes": sum(
+            metadata.row_group(i).total_byte_size
+            for i in range(metadata.num_row_groups)
+        ),
+        "schema": [
+            {
+                "column_name": field.name,
+                "column_type": _duckdb_type(field.type),
+                "null": "YES" if field.nullable else "NO",
+            }
+            for field in schema
+        ],
+        "row_groups": row_groups,
+    }
+
+
+class ParquetCatalog:
+    """
+    In-memory catalog of the parquet files in the data directory.
+
+    Footers are read once per file and re-read only when the file's mtime
+    or size changes. The file listing is refreshed when the directory's
+    own mtime changes (files added, removed or renamed).
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._listing = None
+        self._listing_stamp = None
+        self._lock = threading.Lock()
+
+    def datasets(self) -> list:
+        """Names of the parquet files in DATA_DIR."""
+        try:
+            stamp = (str(DATA_DIR), os.stat(DATA_DIR).st_mtime_ns)
+        except OSError:
+            return []
+
+        with self._lock:
+            if stamp != self._listing_stamp:
+                self._listing = sorted(f.name for f in DATA_DIR.glob("*.parquet"))
+                self._listing_stamp = stamp
+            return list(self._listing)
+
+    def metadata(self, filename: str) -> dict:
+        """Footer metadata for one file, or None if it does not exist."""
+        path = DATA_DIR / filename
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._files.get(str(path))
+        if (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size_bytes"] == stat.st_size
+        ):
+            return entry
+
+        entry = _read_footer(path, stat)
+        with self._lock:
+            self._files[str(path)] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._listing = None
+            self._listing_stamp = None
+
+
+_catalog = ParquetCatalog()
 
 
 def list_available_datasets() -> list:
     """
     List all available Parquet files in the data directory.
 
+    The listing is cached and refreshed only when the directory changes.
+
     Returns:
         List of filenames
     """
@@ -69,30 +1921,45 @@ def list_available_datasets() -> list:
         DATA_DIR.mkdir(parents=True, exist_ok=True)
         return []
 
-    return [f.name for f in DATA_DIR.glob("*.parquet")]
+    return _catalog.datasets()
 
 
 def get_table_info(filename: str) -> dict:
     """
     Get schema information for a Parquet file.
 
+    Read from the file's footer and cached until the file changes.
+
     Args:
         filename: Name of the parquet file
 
     Returns:
         Dictionary with column names and types
     """
-    conn = duckdb.connect(database=":memory:")
+    metadata = _catalog.metadata(filename)
+    if metadata is None:
+        return {"error": f"File {filename} not found"}
+
+    return [dict(column) for column in metadata["schema"]]
+
+
+def get_table_stats(filename: str) -> dict:
+    """
+    Get row counts, file size and row-group min/max statistics for a file.
+
+    Args:
+        filename: Name of the parquet file
 
-    file_path = DATA_DIR / filename
-    if not file_path.exists():
+    Returns:
+        Dictionary with name, path, size_bytes, mtime_ns, num_rows,
+        num_row_groups, uncompressed_bytes, schema, and row_groups (each with num_rows and
+        per-column min, max, null_count and compressed_bytes)
+    """
+    metadata = _catalog.metadata(filename)
+    if metadata is None:
         return {"error": f"File {filename} not found"}
 
-    try:
-        result = conn.execute(f"DESCRIBE SELECT * FROM '{file_path}'").fetchdf()
-        return result.to_dict("records")
-    finally:
-        conn.close()
+    return copy.deepcopy(metadata)
 
 
 def create_sample_data():